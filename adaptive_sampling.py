@@ -0,0 +1,108 @@
+"""
+Adaptive Sampling
+Stop approximate inference at a target precision instead of a fixed budget.
+
+Samplers report running results in batches; after each batch the Agresti-
+Coull confidence interval of every state probability is checked:
+
+    p~ = (p * n_eff + z^2 / 2) / (n_eff + z^2)
+    half_width = z * sqrt(p~ * (1 - p~) / (n_eff + z^2))
+
+(the z^2 terms keep a state that has not been seen yet from reporting a zero
+width), and sampling stops once the widest interval is below the target
+half-width (or below `relative_error * p` for every state, which requires
+every state to have been observed), once the time budget is spent, or when
+the sample budget runs out. n_eff is the effective sample size the sampler
+reports (ESS for likelihood weighting, accepted draws for rejection, the
+chains' ESS for Gibbs).
+
+An MCMC estimate can look precise long before its chains have mixed (a
+sticky chain reports a narrow interval around the wrong value), so samplers
+that pass a diagnostics summary only stop for precision once split R-hat is
+below `max_r_hat` and every chain has at least `min_draws_per_chain` draws.
+"""
+
+import time
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, TypeVar
+
+import numpy as np
+
+T = TypeVar("T")
+
+
+@dataclass
+class StoppingRule:
+    """Precision target and time budget for a batched sampler."""
+    half_width: Optional[float] = None
+    relative_error: Optional[float] = None
+    max_time_s: Optional[float] = None
+    confidence: float = 0.95
+    # MCMC only: convergence required before a precision stop
+    max_r_hat: float = 1.01
+    min_draws_per_chain: int = 100
+
+    @property
+    def z(self) -> float:
+        return NormalDist().inv_cdf(0.5 + self.confidence / 2)
+
+    @property
+    def has_target(self) -> bool:
+        return self.half_width is not None or self.relative_error is not None
+
+    def half_widths(self, weights: np.ndarray, n_eff: float) -> np.ndarray:
+        """Confidence half-width of each state probability."""
+        if n_eff <= 0 or weights.sum() <= 0:
+            return np.full(len(weights), np.inf)
+        z2 = self.z ** 2
+        p = weights / weights.sum()
+        centre = (p * n_eff + z2 / 2) / (n_eff + z2)
+        return self.z * np.sqrt(centre * (1 - centre) / (n_eff + z2))
+
+    def mixed(self, diagnostics: Dict[str, Any]) -> bool:
+        """True once a ChainDiagnostics summary shows long, agreeing chains."""
+        r_hat = diagnostics.get("r_hat")
+        return (diagnostics.get("draws_per_chain", 0) >= self.min_draws_per_chain
+                and r_hat is not None and r_hat < self.max_r_hat)
+
+    def reached(self, weights: np.ndarray, n_eff: float,
+                diagnostics: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        True once every state meets the precision target (and, given an MCMC
+        diagnostics summary, the chains have mixed).
+        """
+        if not self.has_target:
+            return False
+        if diagnostics is not None and not self.mixed(diagnostics):
+            return False
+        widths = self.half_widths(weights, n_eff)
+        if not np.all(np.isfinite(widths)):
+            return False
+        if self.half_width is not None and widths.max() > self.half_width:
+            return False
+        if self.relative_error is not None:
+            p = weights / weights.sum()
+            if np.any(widths > self.relative_error * p):
+                return False
+        return True
+
+
+def run_until(progress: Iterator[T], rule: StoppingRule,
+              measure: Callable[[T], Tuple[np.ndarray, float, Optional[Dict[str, Any]]]]
+              ) -> Tuple[Optional[T], str]:
+    """
+    Consumes `progress` until `rule` is met. `measure` maps each progress item
+    to (state weights, effective sample size, MCMC diagnostics summary or
+    None). Returns the last item and why sampling stopped: "precision",
+    "time" or "budget".
+    """
+    start = time.perf_counter()
+    last = None
+    for last in progress:
+        weights, n_eff, diagnostics = measure(last)
+        if rule.reached(weights, n_eff, diagnostics):
+            return last, "precision"
+        if rule.max_time_s is not None and time.perf_counter() - start >= rule.max_time_s:
+            return last, "time"
+    return last, "budget"
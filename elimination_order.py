@@ -0,0 +1,250 @@
+"""
+Elimination Orders
+Heuristic and search-based variable elimination orders with cost estimates.
+
+The cost of Variable Elimination (and the clique sizes of a junction tree)
+is decided by the elimination order: eliminating X multiplies every factor
+that mentions X into one table over X and its current neighbours in the
+moral graph. An order is scored by simulating that process:
+
+- induced_width    largest such neighbourhood (treewidth bound of the order)
+- max_factor_size  entries of the largest intermediate table
+- flops            multiply-adds over all eliminations (sum of m * |table|,
+                   m = number of factors combined)
+
+Heuristics (greedy, deterministic):
+  min_degree         fewest neighbours
+  min_fill           fewest fill-in edges
+  weighted_min_fill  fill-in edges weighted by the product of their endpoint cardinalities
+
+Searches (randomized, seeded):
+  greedy  best of several min-fill runs with random tie-breaking
+  anneal  simulated annealing over swaps, started from the best heuristic order
+
+The searches score hundreds to thousands of orders, so `compare()` leaves
+them out above SEARCH_MAX_VARIABLES variables; they can still be asked for
+by name.
+"""
+
+import heapq
+import math
+from typing import Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from pgmpy.models import DiscreteBayesianNetwork
+
+HEURISTICS = ("min_degree", "min_fill", "weighted_min_fill", "greedy", "anneal")
+SEARCHES = ("greedy", "anneal")
+DEFAULT_HEURISTIC = "min_fill"
+# Largest elimination set for which compare() also runs the searches.
+SEARCH_MAX_VARIABLES = 200
+
+Graph = Dict[str, Set[str]]
+
+
+class OrderCost(NamedTuple):
+    """Estimated cost of eliminating variables in a given order."""
+    induced_width: int
+    max_factor_size: int
+    flops: int
+
+
+class EliminationOrder(NamedTuple):
+    order: List[str]
+    cost: OrderCost
+    heuristic: str
+
+
+def moral_graph(model: DiscreteBayesianNetwork) -> Graph:
+    """Undirected moral graph as an adjacency dict."""
+    adjacency: Graph = {node: set() for node in model.nodes()}
+    for node in model.nodes():
+        family = [node] + list(model.get_parents(node))
+        for i, a in enumerate(family):
+            for b in family[i + 1:]:
+                adjacency[a].add(b)
+                adjacency[b].add(a)
+    return adjacency
+
+
+def _missing_edges(graph: Graph, node: str) -> Iterable[Tuple[str, str]]:
+    neighbors = list(graph[node])
+    for i, a in enumerate(neighbors):
+        for b in neighbors[i + 1:]:
+            if b not in graph[a]:
+                yield a, b
+
+
+def _eliminate(graph: Graph, node: str) -> Set[str]:
+    """Removes `node`, connecting its neighbours; returns them."""
+    neighbors = graph.pop(node)
+    for a in neighbors:
+        graph[a].discard(node)
+        graph[a].update(neighbors - {a})
+    return neighbors
+
+
+def greedy_order(adjacency: Graph, score: Callable[[Graph, str], float],
+                 nodes: Optional[Iterable[str]] = None,
+                 rng: Optional[np.random.Generator] = None) -> List[str]:
+    """
+    Eliminates the lowest-scoring node of `nodes` (default: all) until none
+    is left. Ties are broken by degree, then name -- or at random with `rng`.
+
+    Scores only depend on a node's neighbourhood, so after each elimination
+    only the eliminated node's neighbours and their neighbours are rescored.
+    """
+    graph = {node: set(neighbors) for node, neighbors in adjacency.items()}
+    remaining = set(graph) if nodes is None else set(nodes)
+    scores = {n: score(graph, n) for n in remaining}
+
+    def key(n: str) -> Tuple[float, int, str]:
+        return scores[n], len(graph[n]), str(n)
+
+    heap = [key(n) + (n,) for n in remaining]
+    heapq.heapify(heap)
+    order: List[str] = []
+    while remaining:
+        if rng is None:
+            entry = heapq.heappop(heap)
+            node = entry[-1]
+            if node not in remaining or entry[:-1] != key(node):
+                continue  # superseded by a later entry
+        else:
+            best = min(scores.values())
+            ties = sorted((n for n, s in scores.items() if s == best), key=str)
+            node = ties[rng.integers(len(ties))]
+        neighbors = _eliminate(graph, node)
+        remaining.discard(node)
+        del scores[node]
+        order.append(node)
+        affected = set(neighbors).union(*(graph[a] for a in neighbors)) & remaining
+        for n in affected:
+            scores[n] = score(graph, n)
+            if rng is None:
+                heapq.heappush(heap, key(n) + (n,))
+    return order
+
+
+class EliminationOrderer:
+    """Elimination orders and their costs for one network, cached per request."""
+
+    def __init__(self, model: DiscreteBayesianNetwork, anneal_steps: int = 2000, greedy_restarts: int = 32):
+        self.model = model
+        self.adjacency = moral_graph(model)
+        self.cardinality: Dict[str, int] = {var: int(model.get_cardinality(var)) for var in model.nodes()}
+        self.scopes: List[Tuple[str, ...]] = [
+            (var,) + tuple(model.get_parents(var)) for var in model.nodes()
+        ]
+        self.anneal_steps = anneal_steps
+        self.greedy_restarts = greedy_restarts
+        self._orders: Dict[Tuple[str, FrozenSet[str], int], EliminationOrder] = {}
+
+    # --- Scores ---
+
+    def _scores(self) -> Dict[str, Callable[[Graph, str], float]]:
+        card = self.cardinality
+        return {
+            "min_degree": lambda g, n: len(g[n]),
+            "min_fill": lambda g, n: sum(1 for _ in _missing_edges(g, n)),
+            "weighted_min_fill": lambda g, n: sum(card[a] * card[b] for a, b in _missing_edges(g, n)),
+        }
+
+    def cost(self, order: Sequence[str]) -> OrderCost:
+        """Simulates eliminating `order` (a subset of the variables is allowed)."""
+        graph = {node: set(neighbors) for node, neighbors in self.adjacency.items()}
+        factors: Dict[int, FrozenSet[str]] = {f: frozenset(scope) for f, scope in enumerate(self.scopes)}
+        # Factors mentioning each variable, so an elimination only touches its own.
+        containing: Dict[str, Set[int]] = {node: set() for node in graph}
+        for f, scope in factors.items():
+            for var in scope:
+                containing[var].add(f)
+        next_id = len(factors)
+        width, largest, flops = 0, 0, 0
+        for node in order:
+            neighbors = _eliminate(graph, node)
+            size = self.cardinality[node] * math.prod(self.cardinality[v] for v in neighbors)
+            ids = containing.pop(node)
+            combined = [factors.pop(f) for f in ids]
+            for scope in combined:
+                for var in scope - {node}:
+                    containing[var] -= ids
+            product = frozenset().union(*combined) - {node} if combined else frozenset(neighbors)
+            factors[next_id] = product
+            for var in product:
+                containing[var].add(next_id)
+            next_id += 1
+            width = max(width, len(neighbors))
+            largest = max(largest, size)
+            flops += max(1, len(combined)) * size
+        return OrderCost(width, largest, flops)
+
+    # --- Orders ---
+
+    def order(self, heuristic: str = DEFAULT_HEURISTIC, nodes: Optional[Iterable[str]] = None,
+              seed: int = 0) -> EliminationOrder:
+        """Order (and its cost) for eliminating `nodes` (default: every variable)."""
+        if heuristic not in HEURISTICS:
+            raise ValueError(f"Unknown elimination heuristic: {heuristic} (choose from {', '.join(HEURISTICS)})")
+        nodes = frozenset(self.adjacency if nodes is None else nodes)
+        unknown = nodes - set(self.adjacency)
+        if unknown:
+            raise ValueError(f"Variables not in network: {', '.join(sorted(map(str, unknown)))}")
+        key = (heuristic, nodes, seed)
+        result = self._orders.get(key)
+        if result is None:
+            result = self._search(heuristic, nodes, seed)
+            self._orders[key] = result
+        return result
+
+    def compare(self, nodes: Optional[Iterable[str]] = None, seed: int = 0) -> List[EliminationOrder]:
+        """
+        Every heuristic's order for the same nodes, cheapest (flops) first.
+        The searches are skipped above SEARCH_MAX_VARIABLES nodes.
+        """
+        nodes = None if nodes is None else frozenset(nodes)
+        count = len(self.adjacency if nodes is None else nodes)
+        heuristics = [h for h in HEURISTICS if h not in SEARCHES or count <= SEARCH_MAX_VARIABLES]
+        return sorted((self.order(h, nodes, seed) for h in heuristics), key=lambda o: o.cost.flops)
+
+    def _search(self, heuristic: str, nodes: FrozenSet[str], seed: int) -> EliminationOrder:
+        scores = self._scores()
+        if heuristic in scores:
+            order = greedy_order(self.adjacency, scores[heuristic], nodes)
+            return EliminationOrder(order, self.cost(order), heuristic)
+
+        rng = np.random.default_rng(seed)
+        if heuristic == "greedy":
+            candidates = [greedy_order(self.adjacency, scores["min_fill"], nodes)]
+            candidates += [
+                greedy_order(self.adjacency, scores["min_fill"], nodes, rng)
+                for _ in range(self.greedy_restarts)
+            ]
+            best = min(candidates, key=lambda o: self.cost(o).flops)
+            return EliminationOrder(best, self.cost(best), heuristic)
+
+        start = min((self.order(h, nodes, seed) for h in scores), key=lambda o: o.cost.flops)
+        order = self._anneal(start.order, rng)
+        return EliminationOrder(order, self.cost(order), heuristic)
+
+    def _anneal(self, order: List[str], rng: np.random.Generator) -> List[str]:
+        """Simulated annealing on log(flops) with random position swaps."""
+        if len(order) < 2:
+            return list(order)
+        current = list(order)
+        current_cost = math.log(self.cost(current).flops)
+        best, best_cost = list(current), current_cost
+        temperature = 1.0
+        cooling = (1e-3 / temperature) ** (1 / max(1, self.anneal_steps))
+        for _ in range(self.anneal_steps):
+            i, j = rng.choice(len(current), size=2, replace=False)
+            current[i], current[j] = current[j], current[i]
+            cost = math.log(self.cost(current).flops)
+            if cost <= current_cost or rng.random() < math.exp((current_cost - cost) / temperature):
+                current_cost = cost
+                if cost < best_cost:
+                    best, best_cost = list(current), cost
+            else:
+                current[i], current[j] = current[j], current[i]
+            temperature *= cooling
+        return best
@@ -0,0 +1,169 @@
+"""
+Engine Cache
+Compiled, ready-to-query inference engines kept per (network, model version).
+
+A `CompiledVE` does the structural work of Variable Elimination once per
+query signature -- (query variables, set of evidence variables) -- instead of
+on every call: pruning of barren / d-separated nodes, factor setup and the
+elimination order (chosen by elimination_order.py, with its estimated cost). Evidence *values* do not change any of that, so toggling
+PhoneCall=0 -> PhoneCall=1 reuses the same plan.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from pgmpy.inference import VariableElimination
+from pgmpy.models import DiscreteBayesianNetwork
+
+from elimination_order import DEFAULT_HEURISTIC, EliminationOrderer, OrderCost
+from state_names import cpd_state_names
+
+
+class QueryPlan(NamedTuple):
+    """Pre-built VE engine over the pruned model plus its elimination order."""
+    engine: VariableElimination
+    elimination_order: List[str]
+    evidence_vars: FrozenSet[str]
+    cost: OrderCost
+
+
+class CompiledVE:
+    """Variable Elimination engine with per-signature query plans."""
+
+    def __init__(self, model: DiscreteBayesianNetwork, heuristic: str = DEFAULT_HEURISTIC):
+        self.model = model
+        self.heuristic = heuristic
+        self.engine = VariableElimination(model)
+        # pgmpy reduces factors by state name; callers pass state indices.
+        self.state_names = {cpd.variable: cpd_state_names(cpd) for cpd in model.get_cpds()}
+        self._plans: Dict[Tuple[Tuple[str, ...], FrozenSet[str]], QueryPlan] = {}
+
+    def plan(self, variables: Sequence[str], evidence_vars: Iterable[str]) -> QueryPlan:
+        """Returns (building on first use) the plan for a query signature."""
+        key = (tuple(variables), frozenset(evidence_vars))
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = self._build_plan(*key)
+            self._plans[key] = plan
+        return plan
+
+    def _build_plan(self, variables: Tuple[str, ...], evidence_vars: FrozenSet[str]) -> QueryPlan:
+        # Pruning only depends on which variables are observed, not their values.
+        placeholder = {var: 0 for var in evidence_vars}
+        pruned, kept = self.engine._prune_bayesian_model(list(variables), placeholder)
+
+        engine = VariableElimination(pruned)
+        engine._initialize_structures()
+
+        to_eliminate = set(pruned.nodes()) - set(variables) - set(kept)
+        elimination = EliminationOrderer(pruned).order(self.heuristic, to_eliminate)
+        return QueryPlan(engine, elimination.order, frozenset(kept), elimination.cost)
+
+    def reduce(self, plan: QueryPlan, evidence: Dict[str, Any]) -> Dict[str, Any]:
+        """Evidence (state indices) that survives pruning, as pgmpy state names."""
+        reduced = {}
+        for var, state in evidence.items():
+            names = self.state_names[var]
+            if not 0 <= int(state) < len(names):
+                raise ValueError(f"State {state} out of range for {var} (cardinality {len(names)})")
+            if var in plan.evidence_vars:
+                reduced[var] = names[int(state)]
+        return reduced
+
+    def run(self, plan: QueryPlan, variables: Sequence[str], reduced: Dict[str, Any]):
+        """Eliminates along the plan's order given reduced evidence."""
+        return plan.engine._variable_elimination(
+            variables=list(variables),
+            operation="marginalize",
+            evidence=reduced,
+            elimination_order=plan.elimination_order,
+            joint=True,
+            show_progress=False,
+        )
+
+    def query(self, variables: Sequence[str], evidence: Optional[Dict[str, Any]] = None):
+        """Normalized joint posterior over `variables` given state indices (a pgmpy DiscreteFactor)."""
+        evidence = evidence or {}
+        for var in variables:
+            if var in evidence:
+                raise ValueError(f"Query variable {var} is also observed")
+        plan = self.plan(variables, evidence.keys())
+        return self.run(plan, variables, self.reduce(plan, evidence))
+
+    @property
+    def plan_count(self) -> int:
+        return len(self._plans)
+
+
+class EngineCache:
+    """
+    Compiled engines per network name, tagged with the registry version they
+    were built from. A version change drops every engine for that network.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+
+    def get(self, network: str, version: int, kind: str, build: Callable[[], Any]) -> Any:
+        with self._lock:
+            entry = self._entries.get(network)
+            if entry is None or entry[0] != version:
+                entry = (version, {})
+                self._entries[network] = entry
+            engines = entry[1]
+            engine = engines.get(kind)
+            if engine is None:
+                engine = build()
+                engines[kind] = engine
+            return engine
+
+    def ve(self, network: str, version: int, model: DiscreteBayesianNetwork,
+           heuristic: str = DEFAULT_HEURISTIC) -> CompiledVE:
+        kind = "ve" if heuristic == DEFAULT_HEURISTIC else f"ve:{heuristic}"
+        return self.get(network, version, kind, lambda: CompiledVE(model, heuristic))
+
+    def invalidate(self, network: Optional[str] = None) -> None:
+        with self._lock:
+            if network is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(network, None)
+
+
+# Shared instance used by the API
+engine_cache = EngineCache()
+
+# Engines for callers that hold a model object rather than a registry name
+# (experiment scripts), keyed by model identity. A weak-keyed map cannot work
+# here (every engine holds its model, so no key would ever die); instead only
+# the most recently used models keep their engines, so models handed to
+# run_exact_inference / gibbs_posterior -- e.g. one per unpickled trial in a
+# joblib worker -- are not pinned for the life of the process.
+MODEL_ENGINES_SIZE = 8
+_model_engines: "OrderedDict[DiscreteBayesianNetwork, Dict[str, Any]]" = OrderedDict()
+_model_engines_lock = threading.Lock()
+
+
+def model_engine(model: DiscreteBayesianNetwork, kind: str, build: Callable[[], Any]) -> Any:
+    """Returns the cached engine of a given kind for a model object, building it once."""
+    with _model_engines_lock:
+        engines = _model_engines.get(model)
+        if engines is None:
+            engines = {}
+            _model_engines[model] = engines
+            while len(_model_engines) > MODEL_ENGINES_SIZE:
+                _model_engines.popitem(last=False)
+        else:
+            _model_engines.move_to_end(model)
+    engine = engines.get(kind)
+    if engine is None:
+        engine = build()
+        engines[kind] = engine
+    return engine
+
+
+def compiled_ve(model: DiscreteBayesianNetwork) -> CompiledVE:
+    """Returns the cached CompiledVE for a model object, compiling it once."""
+    return model_engine(model, "ve", lambda: CompiledVE(model))
@@ -3,71 +3,212 @@ Experiment Utilities
 Shared helper functions for Bayesian Network experiments.
 """
 
-from typing import Dict, Any, Tuple, Optional
+from contextlib import contextmanager
+from functools import partial
+from typing import Callable, Dict, Any, Iterator, List, Sequence, Tuple, Optional
 import time
 import pandas as pd
 import numpy as np
+import networkx as nx
 import matplotlib.pyplot as plt
+from joblib import Parallel, delayed
 from pgmpy.models import BayesianNetwork
-from pgmpy.inference import VariableElimination
-from pgmpy.sampling import GibbsSampling
+
+from engine_cache import compiled_ve, model_engine
+from gibbs_sampler import GibbsSampler
+from mcmc_diagnostics import ChainDiagnostics
+from state_names import encode_evidence, state_index
 
 # Network factories (used by experiments and API)
 from alarm_network import create_alarm_network
 from student_network import create_student_network
-from synthetic_network import create_synthetic_network
-
-def get_all_networks() -> Dict[str, BayesianNetwork]:
-    """Returns a dictionary of all test networks."""
-    return {
-        'Synthetic (3 vars)': create_synthetic_network(),
-        'Alarm (4 vars)': create_alarm_network(),
-        'Student (5 vars)': create_student_network()
+from synthetic_network import (create_random_network, create_synthetic_network, default_query, generated_specs,
+                               standard_query)
+from network_loader import file_networks, network_files, network_name, network_structure
+
+def get_network_factories(generated: Optional[str] = None,
+                          files: Optional[str] = None) -> Dict[str, Callable[[], BayesianNetwork]]:
+    """
+    Returns a function building each test network, plus the generated networks
+    listed in `generated` (default: $GENERATED_NETWORKS, see synthetic_network.py)
+    and the network files listed in `files` (default: $NETWORK_FILES, see
+    network_loader.py).
+    """
+    factories = {
+        'Synthetic (3 vars)': create_synthetic_network,
+        'Alarm (4 vars)': create_alarm_network,
+        'Student (5 vars)': create_student_network
     }
+    for spec in generated_specs(generated):
+        factories[spec.name] = partial(create_random_network, spec)
+    factories.update(file_networks(files))
+    return factories
 
-def get_network_queries() -> Dict[str, Tuple[str, Dict[str, int], int]]:
+def get_all_networks(generated: Optional[str] = None, files: Optional[str] = None) -> Dict[str, BayesianNetwork]:
+    """Returns a dictionary of all test networks (see get_network_factories)."""
+    return {name: build() for name, build in get_network_factories(generated, files).items()}
+
+def get_network_queries(generated: Optional[str] = None,
+                        files: Optional[str] = None) -> Dict[str, Tuple[str, Dict[str, int], int]]:
     """
-    Returns standard queries for each network.
+    Returns standard queries for each network (generated and loaded ones included).
     Format: NetworkName -> (QueryVar, EvidenceDict, TargetState)
     """
-    return {
+    queries = {
         'Synthetic (3 vars)': ('Rain', {'Late': 1}, 1),
         'Alarm (4 vars)': ('Burglary', {'PhoneCall': 1}, 1),
         'Student (5 vars)': ('Intelligence', {'SAT': 1}, 1)
     }
+    for spec in generated_specs(generated):
+        queries[spec.name] = default_query(spec)
+    for path in network_files(files):
+        # Structure only: the CPTs are not needed to pick the query.
+        variables, edges = network_structure(path)
+        graph = nx.DiGraph()
+        graph.add_nodes_from(variables)  # same insertion order as the loaded model
+        graph.add_edges_from(edges)
+        queries[network_name(path, len(variables))] = standard_query(list(nx.topological_sort(graph)), edges)
+    return queries
 
-def run_exact_inference(model: BayesianNetwork, query_var: str, evidence: Dict[str, int], target_state: int) -> float:
-    """Exact inference via Variable Elimination (returns P(query_var=target_state | evidence))."""
-    ve = VariableElimination(model)
-    result = ve.query([query_var], evidence=evidence, show_progress=False)
-    return result.values[target_state]
+def run_exact_inference(model: BayesianNetwork, query_var: str, evidence: Dict[str, Any], target_state: Any) -> float:
+    """
+    Exact inference via Variable Elimination (returns P(query_var=target_state | evidence)).
+    States may be given by index or by name.
+    """
+    result = compiled_ve(model).query([query_var], encode_evidence(model, evidence))
+    return result.values[state_index(model, query_var, target_state)]
 
-def run_gibbs_inference(model: BayesianNetwork, query_var: str, evidence: Dict[str, int], 
-                       samples: int, target_state: int) -> Tuple[float, float]:
+def gibbs_posterior(model: BayesianNetwork, query_var: str, evidence: Dict[str, Any],
+                    samples: int, diagnostics: Optional[ChainDiagnostics] = None,
+                    burn_in: int = 0, thin: int = 1, jobs: int = 1,
+                    seed: Optional[int] = None) -> Tuple[np.ndarray, float]:
     """
-    Gibbs sampling with manual evidence filtering.
-    Returns (estimated_probability, execution_time_seconds).
+    Gibbs sampling estimate of the full distribution P(query_var | evidence).
+    Evidence variables are clamped, so every recorded sweep counts. `burn_in`
+    sweeps per chain are dropped and every `thin`-th sweep is kept; only state
+    counts are held in memory. `diagnostics` collects ESS / R-hat / IAT / MCSE.
+    `jobs` > 1 (or -1 for all cores) splits the chains across processes.
+    `seed` makes the run reproducible (for a given `jobs`).
+    Returns (probability of each state, execution_time_seconds).
     """
-    gibbs = GibbsSampling(model)
+    evidence = encode_evidence(model, evidence)
+    sampler = model_engine(model, "gibbs", lambda: GibbsSampler(model))
     start_time = time.time()
-    
-    # Generate unconditional samples; evidence is applied by filtering.
-    generated_samples = gibbs.sample(size=samples)
-    
-    # Evidence filtering (manual rejection)
-    filtered_samples = generated_samples
-    for var, state in evidence.items():
-        filtered_samples = filtered_samples[filtered_samples[var] == state]
-        
+    if jobs == 1:
+        counts = sampler.sample_counts(query_var, evidence, samples, burn_in, rng=np.random.default_rng(seed),
+                                       diagnostics=diagnostics, thin=thin)
+    else:
+        counts = sampler.sample_counts_parallel([query_var], evidence, samples, jobs, burn_in, seed=seed,
+                                                diagnostics=diagnostics, thin=thin)[query_var]
     execution_time = time.time() - start_time
-    
-    if len(filtered_samples) == 0:
-        return 0.0, execution_time
-        
-    # Empirical probability of the target state
-    prob = filtered_samples[query_var].value_counts(normalize=True).get(target_state, 0.0)
-    
-    return prob, execution_time
+
+    total = counts.sum()
+    return (counts / total if total > 0 else np.zeros(len(counts))), execution_time
+
+def run_gibbs_inference(model: BayesianNetwork, query_var: str, evidence: Dict[str, Any],
+                       samples: int, target_state: Any,
+                       diagnostics: Optional[ChainDiagnostics] = None,
+                       burn_in: int = 0, thin: int = 1, jobs: int = 1,
+                       seed: Optional[int] = None) -> Tuple[float, float]:
+    """
+    Gibbs sampling estimate of P(query_var=target_state | evidence), see
+    gibbs_posterior. Returns (estimated_probability, execution_time_seconds).
+    """
+    posterior, execution_time = gibbs_posterior(model, query_var, evidence, samples, diagnostics,
+                                                burn_in, thin, jobs, seed)
+    return float(posterior[state_index(model, query_var, target_state)]), execution_time
+
+def gibbs_trial(model: BayesianNetwork, query_var: str, evidence: Dict[str, Any], samples: int,
+                target_state: Any, jobs: int = 1, seed: Optional[int] = None) -> Tuple[float, Dict[str, Any]]:
+    """One diagnosed Gibbs run: (P(query_var=target_state | evidence), diagnostics summary)."""
+    diagnostics = ChainDiagnostics()
+    prob, _ = run_gibbs_inference(model, query_var, evidence, samples, target_state,
+                                  diagnostics=diagnostics, jobs=jobs, seed=seed)
+    return prob, diagnostics.summary()
+
+def gibbs_prefix_trial(model: BayesianNetwork, query_var: str, evidence: Dict[str, Any],
+                       checkpoints: Sequence[int], target_state: Any, report_every: int = 50,
+                       seed: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, List[Dict[str, Any]]]:
+    """
+    One diagnosed Gibbs run to max(checkpoints), read off as it goes instead
+    of re-run per size. Returns (samples recorded at each reading, running
+    P(query_var=target_state | evidence) at each reading, diagnostics summary
+    at each checkpoint). Readings come roughly every `report_every` samples;
+    a checkpoint's summary is taken at the first reading at or after it.
+    """
+    evidence = encode_evidence(model, evidence)
+    target = state_index(model, query_var, target_state)
+    sampler = model_engine(model, "gibbs", lambda: GibbsSampler(model))
+    diagnostics = ChainDiagnostics()
+    pending = sorted(checkpoints)
+    sizes, estimates, summaries = [], [], []
+    for counts in sampler.iter_counts(query_var, evidence, pending[-1], report_every,
+                                      rng=np.random.default_rng(seed), diagnostics=diagnostics):
+        total = int(counts.sum())
+        sizes.append(total)
+        estimates.append(counts[target] / total if total > 0 else 0.0)
+        while pending and total >= pending[0]:
+            summaries.append(diagnostics.summary())
+            pending.pop(0)
+    return np.array(sizes), np.array(estimates), summaries
+
+def trial_seeds(count: int, seed: Optional[int] = None) -> List[int]:
+    """Independent per-trial seeds spawned from `seed` (fresh entropy if None)."""
+    return [int(child.generate_state(1)[0]) for child in np.random.SeedSequence(seed).spawn(count)]
+
+def run_trials(fn: Callable[..., Any], tasks: Sequence[tuple], workers: int = 1,
+               seed: Optional[int] = None, label: str = "trials") -> List[Any]:
+    """
+    Runs fn(*task, seed=<trial seed>) for every task over `workers` processes
+    (joblib convention: -1 = all cores) and returns the results in task order.
+    Trial i always gets the i-th seed spawned from `seed`, so results do not
+    depend on the number of workers or on scheduling. Progress is printed as
+    trials complete.
+    """
+    seeds = trial_seeds(len(tasks), seed)
+    calls = (delayed(fn)(*task, seed=trial_seed) for task, trial_seed in zip(tasks, seeds))
+    results = []
+    for result in Parallel(n_jobs=workers, return_as="generator")(calls):
+        results.append(result)
+        print(f"\r  {label}: {len(results)}/{len(tasks)}", end='', flush=True)
+    if tasks:
+        print()
+    return results
+
+def mean_of(summaries: List[Dict[str, Any]], key: str) -> float:
+    """Mean of a diagnostic across trial summaries (NaN if never available)."""
+    values = [s[key] for s in summaries if s.get(key) is not None]
+    return float(np.mean(values)) if values else float('nan')
+
+def max_of(summaries: List[Dict[str, Any]], key: str) -> float:
+    """Maximum of a diagnostic across trial summaries (NaN if never available)."""
+    values = [s[key] for s in summaries if s.get(key) is not None]
+    return float(np.max(values)) if values else float('nan')
+
+class PhaseTimer:
+    """Wall-clock samples per named phase, in nanoseconds (time.perf_counter_ns)."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[int]] = {}
+        self.recording = True  # off during warm-up runs
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            if self.recording:
+                self.samples.setdefault(name, []).append(time.perf_counter_ns() - start)
+
+    def stats(self, name: str) -> Dict[str, float]:
+        """Mean, std and 50th / 90th / 99th percentiles of a phase, in milliseconds."""
+        ms = np.asarray(self.samples.get(name, []), dtype=float) / 1e6
+        if ms.size == 0:
+            return {key: float('nan') for key in ('Mean_ms', 'Std_ms', 'P50_ms', 'P90_ms', 'P99_ms')}
+        p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+        return {'Mean_ms': float(ms.mean()), 'Std_ms': float(ms.std()),
+                'P50_ms': float(p50), 'P90_ms': float(p90), 'P99_ms': float(p99)}
 
 def setup_plot_style():
     """Configures professional plotting aesthetics."""
@@ -0,0 +1,226 @@
+"""
+Forward Sampling
+Vectorized ancestral sampling, likelihood weighting and rejection sampling.
+
+All networks in this project are DAGs with tabular CPDs, so a batch of N
+samples is drawn by visiting the variables once in topological order; each
+visit is one gather into the variable's cumulative CPT (one row per parent
+configuration) and one inverse-CDF draw for all N samples.
+
+- Likelihood weighting clamps evidence variables and weights each sample by
+  P(evidence | parents); no draw is wasted.
+- Rejection sampling draws from the prior and keeps the samples that agree
+  with the evidence -- the honest baseline, with P(evidence) acceptance.
+"""
+
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import networkx as nx
+import numpy as np
+from pgmpy.models import DiscreteBayesianNetwork
+
+# Samples drawn per vectorized pass (bounds memory at variables x BATCH_SIZE).
+BATCH_SIZE = 100_000
+
+
+def _cumulative(weights: np.ndarray) -> np.ndarray:
+    """Row-normalized cumulative distribution of a (rows, states) weight array."""
+    totals = weights.sum(axis=1, keepdims=True)
+    probs = np.divide(weights, totals, out=np.zeros_like(weights), where=totals > 0)
+    cum = np.cumsum(probs, axis=1)
+    # Guard against round-off leaving the last bucket just below 1.0.
+    cum[:, -1] = np.where(totals[:, 0] > 0, 1.0, 0.0)
+    return cum
+
+
+def _draw(cum: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Inverse-CDF draw of one state per row of a cumulative table."""
+    u = rng.random(cum.shape[0])
+    states = (u[:, None] >= cum).sum(axis=1)
+    return np.minimum(states, cum.shape[1] - 1)
+
+
+class SamplingProgress(NamedTuple):
+    """Running result of a batched sampler."""
+    totals: Dict[str, np.ndarray]  # (weighted) state counts per query variable
+    effective_samples: float       # ESS for weighted draws, accepted draws for rejection
+    drawn: int                     # samples drawn so far
+
+
+def _check_samples(samples: int) -> None:
+    if samples is None or samples < 1:
+        raise ValueError("samples must be >= 1")
+
+
+def _batches(samples: int, report_every: int) -> Iterator[Tuple[int, int]]:
+    """(start, size) of consecutive batches, each at most BATCH_SIZE draws."""
+    step = max(1, min(report_every, BATCH_SIZE))
+    for start in range(0, samples, step):
+        yield start, min(step, samples - start)
+
+
+def _last(progress: Iterator[SamplingProgress]) -> SamplingProgress:
+    result = None
+    for result in progress:
+        pass
+    return result
+
+
+class ForwardSampler:
+    """Topologically ordered NumPy view of a DiscreteBayesianNetwork's CPTs."""
+
+    def __init__(self, model: DiscreteBayesianNetwork):
+        self.model = model
+        self.variables: List[str] = list(nx.topological_sort(model))
+        self.index: Dict[str, int] = {var: i for i, var in enumerate(self.variables)}
+        self.cardinality = np.array([int(model.get_cardinality(var)) for var in self.variables])
+
+        # CPT of each variable as an array with axes (variable, *parents), plus
+        # the positions of those axes' variables in the state vector.
+        self.cpts: List[np.ndarray] = []
+        self.scopes: List[Tuple[int, ...]] = []
+        for var in self.variables:
+            cpd = model.get_cpds(var)
+            self.cpts.append(np.asarray(cpd.values, dtype=float))
+            self.scopes.append(tuple(self.index[v] for v in cpd.variables))
+
+        # P(X | parents) as (parent configuration, state): plain for weights,
+        # cumulative for drawing.
+        self.parents: List[np.ndarray] = []
+        self.parent_strides: List[np.ndarray] = []
+        self.cpt_tables: List[np.ndarray] = []
+        self.prior_tables: List[np.ndarray] = []
+        for i, scope in enumerate(self.scopes):
+            parents = np.array(scope[1:], dtype=np.intp)
+            self.parents.append(parents)
+            self.parent_strides.append(self._strides(parents))
+            table = self.cpts[i].reshape(self.cardinality[i], -1).T
+            self.cpt_tables.append(np.ascontiguousarray(table))
+            self.prior_tables.append(_cumulative(table))
+
+    def _strides(self, positions: np.ndarray) -> np.ndarray:
+        """Row-major strides for flattening the states of `positions`."""
+        cards = self.cardinality[positions]
+        strides = np.ones(len(positions), dtype=np.int64)
+        for k in range(len(positions) - 2, -1, -1):
+            strides[k] = strides[k + 1] * cards[k + 1]
+        return strides
+
+    def _encode_evidence(self, evidence: Dict[str, int]) -> Dict[int, int]:
+        encoded = {}
+        for var, value in evidence.items():
+            if var not in self.index:
+                raise ValueError(f"Evidence variable {var} not in network")
+            i = self.index[var]
+            if not 0 <= int(value) < self.cardinality[i]:
+                raise ValueError(f"State {value} out of range for {var} (cardinality {self.cardinality[i]})")
+            encoded[i] = int(value)
+        return encoded
+
+    def _query_index(self, query_var: str) -> int:
+        if query_var not in self.index:
+            raise ValueError(f"Query variable {query_var} not in network")
+        return self.index[query_var]
+
+    def sample(self, n: int, rng: np.random.Generator,
+               clamped: Optional[Dict[int, int]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Draws `n` samples in topological order with `clamped` variables fixed.
+        Returns (state, weights): state is (variables, n) and weights is the
+        likelihood P(clamped | parents) of each sample.
+        """
+        clamped = clamped or {}
+        state = np.zeros((len(self.variables), n), dtype=np.int64)
+        weights = np.ones(n)
+        for i in range(len(self.variables)):
+            rows = self.parent_strides[i] @ state[self.parents[i]]
+            if i in clamped:
+                state[i] = clamped[i]
+                weights *= self.cpt_tables[i][rows, clamped[i]]
+            else:
+                state[i] = _draw(self.prior_tables[i][rows], rng)
+        return state, weights
+
+    def likelihood_weighting(self, query_var: str, evidence: Dict[str, int], samples: int,
+                             rng: Optional[np.random.Generator] = None) -> Tuple[np.ndarray, float]:
+        """
+        Weighted state totals of `query_var` over `samples` likelihood-weighted
+        draws, and the effective sample size (sum w)^2 / sum w^2.
+        """
+        totals, ess = self.likelihood_weighting_many([query_var], evidence, samples, rng)
+        return totals[query_var], ess
+
+    def likelihood_weighting_many(self, query_vars: Sequence[str], evidence: Dict[str, int], samples: int,
+                                  rng: Optional[np.random.Generator] = None) -> Tuple[Dict[str, np.ndarray], float]:
+        """Like likelihood_weighting, for several query variables from the same draws."""
+        progress = _last(self.iter_likelihood_weighting(query_vars, evidence, samples, samples, rng))
+        return progress.totals, progress.effective_samples
+
+    def iter_likelihood_weighting(self, query_vars: Sequence[str], evidence: Dict[str, int], samples: int,
+                                  report_every: int = BATCH_SIZE,
+                                  rng: Optional[np.random.Generator] = None) -> Iterator[SamplingProgress]:
+        """
+        Likelihood weighting in batches of `report_every` draws, yielding the
+        running totals after each batch. Arguments are validated immediately.
+        """
+        _check_samples(samples)
+        positions = {var: self._query_index(var) for var in query_vars}
+        clamped = self._encode_evidence(evidence)
+        rng = rng if rng is not None else np.random.default_rng()
+        return self._run_likelihood_weighting(positions, clamped, samples, report_every, rng)
+
+    def _run_likelihood_weighting(self, positions: Dict[str, int], clamped: Dict[int, int], samples: int,
+                                  report_every: int, rng: np.random.Generator) -> Iterator[SamplingProgress]:
+        totals = {var: np.zeros(self.cardinality[q]) for var, q in positions.items()}
+        weight_sum = 0.0
+        weight_sq_sum = 0.0
+        for start, size in _batches(samples, report_every):
+            state, weights = self.sample(size, rng, clamped)
+            for var, q in positions.items():
+                totals[var] += np.bincount(state[q], weights=weights, minlength=self.cardinality[q])
+            weight_sum += weights.sum()
+            weight_sq_sum += np.square(weights).sum()
+            ess = weight_sum ** 2 / weight_sq_sum if weight_sq_sum > 0 else 0.0
+            yield SamplingProgress(totals, ess, start + size)
+
+    def rejection(self, query_var: str, evidence: Dict[str, int], samples: int,
+                  rng: Optional[np.random.Generator] = None) -> Tuple[np.ndarray, int]:
+        """
+        State counts of `query_var` among the prior draws (out of `samples`)
+        that match the evidence, and the number of accepted draws.
+        """
+        counts, accepted = self.rejection_many([query_var], evidence, samples, rng)
+        return counts[query_var], accepted
+
+    def rejection_many(self, query_vars: Sequence[str], evidence: Dict[str, int], samples: int,
+                       rng: Optional[np.random.Generator] = None) -> Tuple[Dict[str, np.ndarray], int]:
+        """Like rejection, for several query variables from the same draws."""
+        progress = _last(self.iter_rejection(query_vars, evidence, samples, samples, rng))
+        return progress.totals, int(progress.effective_samples)
+
+    def iter_rejection(self, query_vars: Sequence[str], evidence: Dict[str, int], samples: int,
+                       report_every: int = BATCH_SIZE,
+                       rng: Optional[np.random.Generator] = None) -> Iterator[SamplingProgress]:
+        """
+        Rejection sampling in batches of `report_every` draws, yielding the
+        running counts after each batch. Arguments are validated immediately.
+        """
+        _check_samples(samples)
+        positions = {var: self._query_index(var) for var in query_vars}
+        observed = self._encode_evidence(evidence)
+        rng = rng if rng is not None else np.random.default_rng()
+        return self._run_rejection(positions, observed, samples, report_every, rng)
+
+    def _run_rejection(self, positions: Dict[str, int], observed: Dict[int, int], samples: int,
+                       report_every: int, rng: np.random.Generator) -> Iterator[SamplingProgress]:
+        counts = {var: np.zeros(self.cardinality[q], dtype=np.int64) for var, q in positions.items()}
+        accepted_total = 0
+        for start, size in _batches(samples, report_every):
+            state, _ = self.sample(size, rng)
+            accepted = np.ones(size, dtype=bool)
+            for i, value in observed.items():
+                accepted &= state[i] == value
+            for var, q in positions.items():
+                counts[var] += np.bincount(state[q, accepted], minlength=self.cardinality[q])
+            accepted_total += int(accepted.sum())
+            yield SamplingProgress(counts, accepted_total, start + size)
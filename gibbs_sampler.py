@@ -0,0 +1,229 @@
+"""
+Evidence-Clamped Gibbs Sampler
+Vectorized multi-chain Gibbs sampling that conditions on evidence directly.
+
+Evidence variables are fixed to their observed states for the whole run and
+only the free variables are resampled, each from its Markov-blanket
+conditional P(X | parents, children, co-parents). Every recorded sweep is
+therefore a (correlated) sample from P(. | evidence), whereas unconditional
+sampling + rejection keeps only the fraction P(evidence) of its draws.
+
+The conditionals are tabulated once per network as NumPy arrays (one row per
+Markov-blanket configuration, cumulative over the variable's states), and K
+independent chains are advanced together: one update of X for all chains is
+a single gather into its table plus one vectorized inverse-CDF draw. Burn-in
+sweeps are discarded and only every `thin`-th sweep is recorded. Only state
+counts are kept, never the samples themselves, so memory is O(variables x
+states) for any number of samples; pass a `ChainDiagnostics` to also track
+ESS, R-hat and autocorrelation per chain.
+
+`sample_counts_parallel` splits a sample budget across worker processes
+(joblib), each running its own block of chains from an independent child
+seed, and sums the counts (and merges the diagnostics) at the end.
+"""
+
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from joblib import Parallel, delayed, effective_n_jobs
+from pgmpy.models import DiscreteBayesianNetwork
+
+from forward_sampling import ForwardSampler, _check_samples, _cumulative, _draw
+from junction_tree import contract
+from mcmc_diagnostics import ChainDiagnostics
+
+# Blankets whose table would exceed this many entries are evaluated on the fly.
+MAX_TABLE_SIZE = 1 << 20
+# Smallest per-process share of a parallel run; below it, start-up costs dominate.
+MIN_SAMPLES_PER_JOB = 5000
+
+# One variable's diagnostics, or {variable: diagnostics} for several.
+Diagnostics = Union[ChainDiagnostics, Dict[str, ChainDiagnostics]]
+
+
+def _count_job(sampler: "GibbsSampler", query_vars: Optional[Sequence[str]], evidence: Dict[str, int],
+               samples: int, burn_in: int, chains: int, seed: np.random.SeedSequence,
+               thin: int) -> Tuple[Dict[str, np.ndarray], ChainDiagnostics]:
+    """One worker's share of sample_counts_parallel."""
+    diagnostics = ChainDiagnostics()
+    counts = sampler.sample_counts_many(query_vars, evidence, samples, burn_in, chains,
+                                        np.random.default_rng(seed), diagnostics, thin)
+    return counts, diagnostics
+
+
+class GibbsSampler(ForwardSampler):
+    """Multi-chain Gibbs sampler over a DiscreteBayesianNetwork with tabular CPDs."""
+
+    def __init__(self, model: DiscreteBayesianNetwork):
+        super().__init__(model)
+
+        # Factors mentioning each variable: its own CPT and its children's CPTs.
+        self.blanket_factors: List[List[int]] = [[] for _ in self.variables]
+        for f, scope in enumerate(self.scopes):
+            for i in scope:
+                self.blanket_factors[i].append(f)
+
+        self.blankets: List[np.ndarray] = []
+        self.blanket_strides: List[np.ndarray] = []
+        self.tables: List[Optional[np.ndarray]] = []
+        for i in range(len(self.variables)):
+            blanket = sorted({j for f in self.blanket_factors[i] for j in self.scopes[f]} - {i})
+            blanket = np.array(blanket, dtype=np.intp)
+            self.blankets.append(blanket)
+            self.blanket_strides.append(self._strides(blanket))
+            self.tables.append(self._blanket_table(i, blanket))
+
+    def _blanket_table(self, i: int, blanket: np.ndarray) -> Optional[np.ndarray]:
+        """Cumulative P(X_i | blanket) with one row per blanket configuration."""
+        size = int(self.cardinality[i]) * int(np.prod(self.cardinality[blanket], dtype=np.int64))
+        if size > MAX_TABLE_SIZE:
+            return None
+        factors = [(self.cpts[f], self.scopes[f]) for f in self.blanket_factors[i]]
+        joint = contract(factors, tuple(blanket) + (i,))
+        return _cumulative(joint.reshape(-1, self.cardinality[i]))
+
+    def _conditional(self, i: int, state: np.ndarray) -> np.ndarray:
+        """Cumulative P(X_i | Markov blanket) for every chain (rows = chains)."""
+        table = self.tables[i]
+        if table is not None:
+            rows = self.blanket_strides[i] @ state[self.blankets[i]]
+            return table[rows]
+        # Blanket too large to tabulate: gather each factor's slice per chain.
+        chains = state.shape[1]
+        weights = np.ones((chains, self.cardinality[i]))
+        values = np.arange(self.cardinality[i])[None, :]
+        for f in self.blanket_factors[i]:
+            indexer = tuple(values if j == i else state[j][:, None] for j in self.scopes[f])
+            weights *= self.cpts[f][indexer]
+        return _cumulative(weights)
+
+    def sample_counts(self, query_var: str, evidence: Dict[str, int], samples: int,
+                      burn_in: int = 0, chains: int = 16,
+                      rng: Optional[np.random.Generator] = None,
+                      diagnostics: Optional[ChainDiagnostics] = None,
+                      thin: int = 1) -> np.ndarray:
+        """
+        Runs `chains` independent chains with evidence clamped until `samples`
+        sweeps have been recorded in total (after `burn_in` sweeps per chain,
+        keeping every `thin`-th sweep), and returns how often each state of
+        `query_var` was visited. `diagnostics`, if given, is updated with
+        every complete recorded sweep.
+        """
+        counts = self.sample_counts_many([query_var], evidence, samples, burn_in, chains, rng,
+                                         diagnostics, thin)
+        return counts[query_var]
+
+    def sample_counts_many(self, query_vars: Optional[Sequence[str]], evidence: Dict[str, int], samples: int,
+                           burn_in: int = 0, chains: int = 16,
+                           rng: Optional[np.random.Generator] = None,
+                           diagnostics: Optional[Diagnostics] = None,
+                           thin: int = 1) -> Dict[str, np.ndarray]:
+        """
+        Like sample_counts, for several query variables from the same chains
+        (None = every variable); `diagnostics` follows the first of them, or
+        pass a {variable: ChainDiagnostics} dict to follow several.
+        """
+        counts = None
+        for counts in self.iter_counts_many(query_vars, evidence, samples, samples, burn_in, chains, rng,
+                                            diagnostics, thin):
+            pass
+        return counts
+
+    def sample_counts_parallel(self, query_vars: Optional[Sequence[str]], evidence: Dict[str, int],
+                               samples: int, jobs: int = -1, burn_in: int = 0, chains: int = 16,
+                               seed: Optional[int] = None,
+                               diagnostics: Optional[ChainDiagnostics] = None,
+                               thin: int = 1) -> Dict[str, np.ndarray]:
+        """
+        Like sample_counts_many, with the budget split across `jobs` worker
+        processes (joblib convention: -1 = all cores), each running `chains`
+        chains. Worker k draws from child k of SeedSequence(seed), so a given
+        (seed, jobs) pair reproduces the same counts. Fewer workers are used
+        when a share would drop below MIN_SAMPLES_PER_JOB.
+        """
+        # Validate before fanning out.
+        self.iter_counts_many(query_vars, evidence, samples, samples, burn_in, chains, None, None, thin)
+        jobs = max(1, min(effective_n_jobs(jobs), samples // MIN_SAMPLES_PER_JOB))
+        seeds = np.random.SeedSequence(seed).spawn(jobs)
+        shares = [samples // jobs + (k < samples % jobs) for k in range(jobs)]
+
+        if jobs == 1:
+            parts = [_count_job(self, query_vars, evidence, samples, burn_in, chains, seeds[0], thin)]
+        else:
+            parts = Parallel(n_jobs=jobs, max_nbytes=None)(
+                delayed(_count_job)(self, query_vars, evidence, share, burn_in, chains, job_seed, thin)
+                for share, job_seed in zip(shares, seeds)
+            )
+
+        counts = {var: sum(part[0][var] for part in parts) for var in parts[0][0]}
+        if diagnostics is not None:
+            for _, part in parts:
+                diagnostics.merge(part)
+        return counts
+
+    def iter_counts(self, query_var: str, evidence: Dict[str, int], samples: int, report_every: int,
+                    burn_in: int = 0, chains: int = 16,
+                    rng: Optional[np.random.Generator] = None,
+                    diagnostics: Optional[ChainDiagnostics] = None,
+                    thin: int = 1) -> Iterator[np.ndarray]:
+        """
+        Same run as sample_counts, yielding the running counts of `query_var`
+        roughly every `report_every` recorded samples and once at the end.
+        Arguments are validated immediately; sampling starts on first next().
+        """
+        progress = self.iter_counts_many([query_var], evidence, samples, report_every, burn_in, chains, rng,
+                                         diagnostics, thin)
+        return (counts[query_var] for counts in progress)
+
+    def iter_counts_many(self, query_vars: Optional[Sequence[str]], evidence: Dict[str, int], samples: int,
+                         report_every: int, burn_in: int = 0, chains: int = 16,
+                         rng: Optional[np.random.Generator] = None,
+                         diagnostics: Optional[Diagnostics] = None,
+                         thin: int = 1) -> Iterator[Dict[str, np.ndarray]]:
+        """Same run as sample_counts_many, yielding running counts like iter_counts."""
+        if burn_in < 0 or thin < 1:
+            raise ValueError("burn_in must be >= 0 and thin >= 1")
+        _check_samples(samples)
+        query_vars = self.variables if query_vars is None else query_vars
+        positions = {var: self._query_index(var) for var in query_vars}
+        clamped = self._encode_evidence(evidence)
+        if isinstance(diagnostics, dict):
+            tracked = {positions[var]: d for var, d in diagnostics.items() if var in positions}
+        elif diagnostics is not None and positions:
+            tracked = {next(iter(positions.values())): diagnostics}
+        else:
+            tracked = {}
+        rng = rng if rng is not None else np.random.default_rng()
+        return self._run(positions, clamped, samples, max(1, report_every), burn_in, thin, chains,
+                         rng, tracked)
+
+    def _run(self, positions: Dict[str, int], clamped: Dict[int, int], samples: int,
+             report_every: int, burn_in: int, thin: int, chains: int, rng: np.random.Generator,
+             tracked: Dict[int, ChainDiagnostics]) -> Iterator[Dict[str, np.ndarray]]:
+        free = [i for i in range(len(self.variables)) if i not in clamped]
+        chains = max(1, min(chains, samples))
+
+        # Chains start from a forward sample with the evidence held fixed.
+        state, _ = self.sample(chains, rng, clamped)
+        # One histogram per query variable: memory is O(variables x states).
+        counts = {var: np.zeros(self.cardinality[q], dtype=np.int64) for var, q in positions.items()}
+        recorded = 0
+        next_report = report_every
+        sweep = 0
+        while recorded < samples:
+            for i in free:
+                state[i] = _draw(self._conditional(i, state), rng)
+            sweep += 1
+            if sweep <= burn_in or (sweep - burn_in) % thin:
+                continue
+            take = min(chains, samples - recorded)
+            for var, q in positions.items():
+                counts[var] += np.bincount(state[q, :take], minlength=self.cardinality[q])
+            if take == chains:
+                for q, diagnostics in tracked.items():
+                    diagnostics.update(state[q], self.cardinality[q])
+            recorded += take
+            if recorded >= next_report and recorded < samples:
+                yield {var: c.copy() for var, c in counts.items()}
+                next_report += report_every
+        yield counts
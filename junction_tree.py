@@ -0,0 +1,285 @@
+"""
+Junction Tree Inference
+Exact inference by message passing on a clique tree, compiled once per network.
+
+Compilation (done once): moralize the DAG, pick an elimination order (greedy
+min-fill by default, see elimination_order.py), turn the elimination cliques into a tree and multiply every CPT into
+one clique potential. A query then runs a single collect/distribute sweep
+(Shafer-Shenoy) with the evidence applied as indicator vectors, which yields
+the posterior of *every* variable at once.
+"""
+
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from pgmpy.models import DiscreteBayesianNetwork
+
+from elimination_order import DEFAULT_HEURISTIC, EliminationOrder, EliminationOrderer
+
+Factor = Tuple[np.ndarray, Tuple[str, ...]]
+
+
+def contract(factors: Sequence[Factor], output: Sequence[str]) -> np.ndarray:
+    """Multiplies labelled arrays and sums out every variable not in `output`."""
+    symbols: Dict[str, int] = {}
+    operands: List = []
+    for values, variables in factors:
+        operands.append(values)
+        operands.append([symbols.setdefault(var, len(symbols)) for var in variables])
+    for var in output:
+        symbols.setdefault(var, len(symbols))
+    operands.append([symbols[var] for var in output])
+    return np.einsum(*operands, optimize=len(factors) > 2)
+
+
+class JunctionTreeEngine:
+    """Calibrated clique tree over a DiscreteBayesianNetwork."""
+
+    def __init__(self, model: DiscreteBayesianNetwork, elimination_order: Optional[Sequence[str]] = None,
+                 heuristic: str = DEFAULT_HEURISTIC):
+        self.model = model
+        self.variables: List[str] = list(model.nodes())
+        self.cardinality: Dict[str, int] = {var: int(model.get_cardinality(var)) for var in self.variables}
+
+        orderer = EliminationOrderer(model)
+        if elimination_order is None:
+            self.elimination = orderer.order(heuristic)
+        else:
+            self.elimination = EliminationOrder(list(elimination_order), orderer.cost(elimination_order), "custom")
+        self._build_tree(orderer.adjacency, self.elimination.order)
+        self._build_potentials()
+        self._prior = self.marginals({})
+
+    # --- Compilation ---
+
+    def _build_tree(self, adjacency: Dict[str, Set[str]], order: Sequence[str]) -> None:
+        # One clique per eliminated variable: {v} + its neighbours at elimination time.
+        # Clique i's parent is the clique of the first neighbour eliminated after v;
+        # cliques are therefore stored children-before-parents.
+        graph = {node: set(neighbors) for node, neighbors in adjacency.items()}
+        position = {var: i for i, var in enumerate(order)}
+        self.cliques: List[Tuple[str, ...]] = []
+        self.parent: List[Optional[int]] = []
+
+        for var in order:
+            neighbors = graph.pop(var)
+            for a in neighbors:
+                graph[a].discard(var)
+                graph[a].update(neighbors - {a})
+            rest = sorted(neighbors, key=position.get)
+            self.cliques.append((var,) + tuple(rest))
+            self.parent.append(position[rest[0]] if rest else None)
+
+        self.children: List[List[int]] = [[] for _ in self.cliques]
+        for i, p in enumerate(self.parent):
+            if p is not None:
+                self.children[p].append(i)
+        # Separator with the parent is the clique minus its eliminated variable.
+        self.separators: List[Tuple[str, ...]] = [clique[1:] for clique in self.cliques]
+        self.home: Dict[str, int] = {var: i for i, var in enumerate(order)}
+
+    def _build_potentials(self) -> None:
+        shapes = [tuple(self.cardinality[v] for v in clique) for clique in self.cliques]
+        assigned: List[List[Factor]] = [[] for _ in self.cliques]
+        for node in self.variables:
+            cpd = self.model.get_cpds(node)
+            scope = tuple(cpd.variables)
+            # The family is a clique of the moral graph, so the clique of its
+            # first-eliminated member contains all of it.
+            target = min(self.home[var] for var in scope)
+            assigned[target].append((cpd.values, scope))
+
+        self.potentials: List[np.ndarray] = []
+        for clique, shape, factors in zip(self.cliques, shapes, assigned):
+            potential = np.ones(shape)
+            if factors:
+                potential = contract([(potential, clique)] + factors, clique)
+            self.potentials.append(potential)
+
+    # --- Queries ---
+
+    @property
+    def max_clique_size(self) -> int:
+        return max((len(c) for c in self.cliques), default=0)
+
+    def _indicator(self, var: str, state: int) -> Factor:
+        if var not in self.home:
+            raise ValueError(f"Evidence variable {var} not in network")
+        card = self.cardinality[var]
+        state = int(state)
+        if not 0 <= state < card:
+            raise ValueError(f"State {state} out of range for {var} (cardinality {card})")
+        indicator = np.zeros(card)
+        indicator[state] = 1.0
+        return indicator, (var,)
+
+    def _evidence_factors(self, evidence: Dict[str, int]) -> List[List[Factor]]:
+        extra: List[List[Factor]] = [[] for _ in self.cliques]
+        for var, state in evidence.items():
+            factor = self._indicator(var, state)
+            extra[self.home[var]].append(factor)
+        return extra
+
+    @staticmethod
+    def _normalized(message: np.ndarray) -> np.ndarray:
+        # Rescale messages to avoid underflow on long chains; posteriors are
+        # normalized at the end so the constant does not matter.
+        total = message.sum()
+        return message / total if total > 0 else message
+
+    def calibrate(self, evidence: Dict[str, int]) -> List[np.ndarray]:
+        """One collect + distribute sweep; returns the belief of every clique."""
+        extra = self._evidence_factors(evidence)
+        n = len(self.cliques)
+        up: List[Optional[np.ndarray]] = [None] * n
+        down: List[Optional[np.ndarray]] = [None] * n
+
+        def local(i: int) -> List[Factor]:
+            return [(self.potentials[i], self.cliques[i])] + extra[i]
+
+        # Collect: leaves -> roots (children precede parents in storage order).
+        for i in range(n):
+            if self.parent[i] is None:
+                continue
+            factors = local(i) + [(up[c], self.separators[c]) for c in self.children[i]]
+            up[i] = self._normalized(contract(factors, self.separators[i]))
+
+        # Distribute: roots -> leaves.
+        for i in reversed(range(n)):
+            for c in self.children[i]:
+                factors = local(i) + [
+                    (up[k], self.separators[k]) for k in self.children[i] if k != c
+                ]
+                if down[i] is not None:
+                    factors.append((down[i], self.separators[i]))
+                down[c] = self._normalized(contract(factors, self.separators[c]))
+
+        beliefs = []
+        for i in range(n):
+            factors = local(i) + [(up[c], self.separators[c]) for c in self.children[i]]
+            if down[i] is not None:
+                factors.append((down[i], self.separators[i]))
+            beliefs.append(contract(factors, self.cliques[i]))
+        return beliefs
+
+    def marginals(self, evidence: Optional[Dict[str, int]] = None,
+                  variables: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+        """Posterior distribution of every (or each requested) variable given evidence."""
+        evidence = evidence or {}
+        if not evidence and variables is None and hasattr(self, "_prior"):
+            return {var: values.copy() for var, values in self._prior.items()}
+
+        beliefs = self.calibrate(evidence)
+        wanted = self.variables if variables is None else list(variables)
+        result: Dict[str, np.ndarray] = {}
+        for var in wanted:
+            result[var] = self._marginal(var, beliefs[self.home[var]])
+        return result
+
+    def _marginal(self, var: str, belief: np.ndarray) -> np.ndarray:
+        axes = tuple(range(1, len(self.cliques[self.home[var]])))
+        values = belief.sum(axis=axes) if axes else belief
+        total = values.sum()
+        if total <= 0:
+            raise ValueError("Evidence has zero probability")
+        return values / total
+
+    def query(self, variable: str, evidence: Optional[Dict[str, int]] = None) -> np.ndarray:
+        """Posterior distribution of a single variable."""
+        if variable not in self.home:
+            raise ValueError(f"Query variable {variable} not in network")
+        return self.marginals(evidence, [variable])[variable]
+
+
+class JunctionTreeSession:
+    """
+    Evidence held against a compiled junction tree, for interactive use.
+
+    Messages are kept between queries. Changing the evidence of a variable
+    whose home clique is h only invalidates the upward messages on the path
+    from h to its root and the downward messages into cliques off that path;
+    a query then recomputes just the invalidated messages it needs.
+    """
+
+    def __init__(self, engine: JunctionTreeEngine):
+        self.engine = engine
+        self.lock = threading.Lock()
+        self.evidence: Dict[str, int] = {}
+        n = len(engine.cliques)
+        self._extra: List[List[Factor]] = [[] for _ in range(n)]
+        self._up: List[Optional[np.ndarray]] = [None] * n
+        self._down: List[Optional[np.ndarray]] = [None] * n
+        # Cliques from each clique up to its root (inclusive).
+        self._path: List[List[int]] = []
+        for i in range(n):
+            path = [i]
+            while engine.parent[path[-1]] is not None:
+                path.append(engine.parent[path[-1]])
+            self._path.append(path)
+        self.messages_computed = 0
+
+    def update(self, evidence: Dict[str, int]) -> List[str]:
+        """Replaces the evidence; returns the variables whose evidence changed."""
+        engine = self.engine
+        indicators = {var: engine._indicator(var, state) for var, state in evidence.items()}  # validates
+        evidence = {var: int(state) for var, state in evidence.items()}
+        changed = [var for var in set(self.evidence) | set(evidence) if self.evidence.get(var) != evidence.get(var)]
+        self.evidence = evidence
+
+        for var in changed:
+            h = engine.home[var]
+            self._extra[h] = [indicators[v] for v in evidence if engine.home[v] == h]
+            on_path = set(self._path[h])
+            for i in on_path:
+                self._up[i] = None
+            for i in range(len(self._down)):
+                if i not in on_path:
+                    self._down[i] = None
+        return sorted(changed)
+
+    def _local(self, i: int) -> List[Factor]:
+        return [(self.engine.potentials[i], self.engine.cliques[i])] + self._extra[i]
+
+    def _collect(self) -> None:
+        engine = self.engine
+        for i in range(len(engine.cliques)):
+            if engine.parent[i] is None or self._up[i] is not None:
+                continue
+            factors = self._local(i) + [(self._up[c], engine.separators[c]) for c in engine.children[i]]
+            self._up[i] = engine._normalized(contract(factors, engine.separators[i]))
+            self.messages_computed += 1
+
+    def _down_to(self, k: int) -> Optional[np.ndarray]:
+        engine = self.engine
+        for c in reversed(self._path[k][:-1]):  # root side first
+            if self._down[c] is not None:
+                continue
+            p = engine.parent[c]
+            factors = self._local(p) + [(self._up[s], engine.separators[s]) for s in engine.children[p] if s != c]
+            if self._down[p] is not None:
+                factors.append((self._down[p], engine.separators[p]))
+            self._down[c] = engine._normalized(contract(factors, engine.separators[c]))
+            self.messages_computed += 1
+        return self._down[k]
+
+    def marginals(self, variables: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+        """Posteriors of every (or each requested) variable under the session evidence."""
+        engine = self.engine
+        wanted = engine.variables if variables is None else list(variables)
+        for var in wanted:
+            if var not in engine.home:
+                raise ValueError(f"Query variable {var} not in network")
+        self._collect()
+        beliefs: Dict[int, np.ndarray] = {}
+        result: Dict[str, np.ndarray] = {}
+        for var in wanted:
+            k = engine.home[var]
+            if k not in beliefs:
+                factors = self._local(k) + [(self._up[c], engine.separators[c]) for c in engine.children[k]]
+                down = self._down_to(k)
+                if down is not None:
+                    factors.append((down, engine.separators[k]))
+                beliefs[k] = contract(factors, engine.cliques[k])
+            result[var] = engine._marginal(var, beliefs[k])
+        return result
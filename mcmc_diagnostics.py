@@ -0,0 +1,182 @@
+"""
+MCMC Diagnostics
+Streaming convergence diagnostics for multi-chain samplers.
+
+Correlated Gibbs draws are worth fewer than their count. `ChainDiagnostics`
+watches the state of one variable in every chain after each sweep and keeps
+only per-chain state counts in batches, never the draws themselves; when the
+batch table fills up, adjacent batches are merged and the batch length is
+doubled, so memory stays at (max_batches, chains, states) for any run length.
+
+For the indicator X = s of each state, from m batch means of length L:
+
+    sigma^2 = L * var(batch means)      (asymptotic variance of the mean)
+    IAT     = sigma^2 / p(1 - p)        (integrated autocorrelation time)
+    ESS     = N / IAT                   MCSE = sqrt(sigma^2 / N)
+
+and split R-hat compares the first and second half of every chain (the
+within-half variance of an indicator is p_h(1 - p_h), so half-chain means
+suffice). Values near 1 mean the chains agree; above ~1.01 they have not
+mixed yet.
+
+Batch means only capture autocorrelation shorter than the batch: length-1
+means of an indicator have variance exactly p(1 - p), so IAT would read ~1
+whatever the mixing. For ESS, IAT and MCSE the stored batches are re-cut to
+L >= sqrt(draws per chain), the usual consistent batch-means choice, and
+those three stay None until there are MIN_BATCHES such batches per chain.
+"""
+
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+# Batch table height; full tables are halved by merging neighbouring batches.
+MAX_BATCHES = 64
+# Fewer complete batches than this and the variance estimates are meaningless.
+MIN_BATCHES = 4
+
+
+def _finite(value: float) -> Optional[float]:
+    return float(value) if np.isfinite(value) else None
+
+
+class ChainDiagnostics:
+    """Incremental ESS, split R-hat, IAT and MCSE of one variable across chains."""
+
+    def __init__(self, max_batches: int = MAX_BATCHES):
+        self.max_batches = max(2 * MIN_BATCHES, max_batches - max_batches % 2)
+        self.batch_length = 1
+        self.batches: Optional[np.ndarray] = None  # (complete batches, chains, states)
+        self.current: Optional[np.ndarray] = None  # counts of the batch being filled
+        self.filled = 0       # complete batches in use
+        self.in_current = 0   # sweeps recorded in the current batch
+
+    @property
+    def chains(self) -> int:
+        return 0 if self.current is None else self.current.shape[0]
+
+    @property
+    def draws_per_chain(self) -> int:
+        return self.filled * self.batch_length + self.in_current
+
+    def update(self, states: np.ndarray, cardinality: int) -> None:
+        """Records one sweep: `states` holds the variable's state in each chain."""
+        if self.current is None:
+            self.current = np.zeros((len(states), cardinality), dtype=np.int64)
+            self.batches = np.zeros((self.max_batches, len(states), cardinality), dtype=np.int64)
+        self.current[np.arange(len(states)), states] += 1
+        self.in_current += 1
+        if self.in_current == self.batch_length:
+            self.batches[self.filled] = self.current
+            self.current[:] = 0
+            self.in_current = 0
+            self.filled += 1
+            if self.filled == self.max_batches:
+                half = self.max_batches // 2
+                self.batches[:half] = self.batches[0::2] + self.batches[1::2]
+                self.batches[half:] = 0
+                self.filled = half
+                self.batch_length *= 2
+
+    def _coarsen(self, batch_length: int, filled: int) -> np.ndarray:
+        """Complete batches re-cut to `batch_length`, first `filled` only."""
+        batches = self.batches[:self.filled]
+        length = self.batch_length
+        while length < batch_length:
+            pairs = len(batches) // 2
+            batches = batches[0:2 * pairs:2] + batches[1:2 * pairs:2]
+            length *= 2
+        return batches[:filled]
+
+    def merge(self, other: "ChainDiagnostics") -> None:
+        """
+        Adds the chains of `other` (e.g. from another process). Both sides are
+        cut to their common batch length and number of complete batches; any
+        incomplete trailing batch is dropped.
+        """
+        if other.current is None:
+            return
+        if self.current is None:
+            self.__dict__.update({k: (v.copy() if isinstance(v, np.ndarray) else v)
+                                  for k, v in other.__dict__.items()})
+            return
+        length = max(self.batch_length, other.batch_length)
+        filled = min(self.filled * self.batch_length, other.filled * other.batch_length) // length
+        merged = np.concatenate([self._coarsen(length, filled), other._coarsen(length, filled)], axis=1)
+
+        self.batches = np.zeros((self.max_batches,) + merged.shape[1:], dtype=np.int64)
+        self.batches[:filled] = merged
+        self.current = np.zeros(merged.shape[1:], dtype=np.int64)
+        self.batch_length = length
+        self.filled = filled
+        self.in_current = 0
+
+    def _estimation_batches(self) -> Optional[Tuple[np.ndarray, int]]:
+        """(complete batches, their length) re-cut to length >= sqrt(draws per chain), None if too few."""
+        recorded = self.filled * self.batch_length
+        length = self.batch_length
+        while length * length < recorded:
+            length *= 2
+        filled = recorded // length
+        if filled < MIN_BATCHES:
+            return None
+        return self._coarsen(length, filled), length
+
+    def per_state(self) -> Optional[Dict[str, np.ndarray]]:
+        """
+        ESS, IAT, MCSE and split R-hat of every state (None until enough
+        batches; ESS, IAT and MCSE are all-NaN while batches are too short).
+        """
+        if self.filled < MIN_BATCHES:
+            return None
+        states = self.batches.shape[2]
+        ess = iat = mcse = np.full(states, np.nan)
+        estimation = self._estimation_batches()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if estimation is not None:
+                coarse, length = estimation
+                n = coarse.shape[0] * coarse.shape[1] * length
+                means = coarse / length
+                p = means.mean(axis=(0, 1))
+                variance = p * (1 - p)
+                sigma2 = length * means.reshape(-1, states).var(axis=0, ddof=1)
+                iat = np.where(variance > 0, sigma2 / variance, np.nan)
+                ess = n / iat
+                mcse = np.sqrt(sigma2 / n)
+
+            # Split R-hat over 2 x chains half-chains of equal length.
+            batches = self.batches[:self.filled]
+            half = self.filled // 2
+            halves = np.concatenate([batches[:half].sum(axis=0), batches[-half:].sum(axis=0)])
+            n_half = half * self.batch_length
+            half_means = halves / n_half
+            within = (half_means * (1 - half_means)).mean(axis=0) * n_half / (n_half - 1)
+            between = n_half * half_means.var(axis=0, ddof=1)
+            pooled = (n_half - 1) / n_half * within + between / n_half
+            r_hat = np.where(within > 0, np.sqrt(pooled / within), np.nan)
+
+        return {"ess": ess, "iat": iat, "mcse": mcse, "r_hat": r_hat}
+
+    def effective_samples(self) -> float:
+        """Smallest ESS over the observed states (0 while undetermined)."""
+        stats = self.per_state()
+        if stats is None or not np.any(np.isfinite(stats["ess"])):
+            return 0.0
+        return float(np.nanmin(stats["ess"]))
+
+    def summary(self) -> Dict[str, Any]:
+        """JSON-friendly worst case over states: min ESS, max IAT, R-hat and MCSE."""
+        result: Dict[str, Any] = {
+            "chains": self.chains,
+            "draws_per_chain": self.draws_per_chain,
+            "ess": None, "r_hat": None, "iat": None, "mcse": None,
+        }
+        stats = self.per_state()
+        if stats is None:
+            return result
+        worst = {"ess": np.nanmin, "r_hat": np.nanmax, "iat": np.nanmax, "mcse": np.nanmax}
+        for name, reduce in worst.items():
+            values = stats[name]
+            if np.any(np.isfinite(values)):
+                result[name] = _finite(reduce(values))
+        return result
@@ -0,0 +1,229 @@
+"""
+Network Loader
+Standard benchmark networks from BIF / XMLBIF / UAI files, with a compiled cache.
+
+Parsing a text network (pgmpy's readers) is slow: seconds for a few hundred
+variables. The first load of a file therefore writes a compact compiled
+copy -- CPT arrays, parent indices and state names in one NumPy `.npz` --
+keyed by the file's content hash, and later loads (every server start)
+rebuild the model from that in milliseconds. Editing the file changes the
+hash, so a stale cache is never used.
+
+Supported extensions: .bif, .xml / .xmlbif, .uai (Bayesian networks only).
+
+Configuration (environment variables):
+  NETWORK_FILES      comma-separated files or directories of networks that
+                     get_all_networks() registers, named "<File stem> (<n> vars)"
+  NETWORK_CACHE_DIR  where compiled copies are written (default: .network_cache)
+"""
+
+import hashlib
+import math
+import os
+import zipfile
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from pgmpy.factors.discrete import TabularCPD
+from pgmpy.models import DiscreteBayesianNetwork
+
+from state_names import cpd_state_names
+
+# Bump when the .npz layout changes; older cache files are then ignored.
+CACHE_FORMAT = 1
+EXTENSIONS = {".bif": "bif", ".xml": "xmlbif", ".xmlbif": "xmlbif", ".uai": "uai"}
+DEFAULT_CACHE_DIR = ".network_cache"
+
+
+def network_name(path: Path, variables: int) -> str:
+    """Registry name of a network file with `variables` variables, e.g. "Alarm (37 vars)"."""
+    stem = path.stem
+    return f"{stem[:1].upper()}{stem[1:]} ({variables} vars)"
+
+
+def parse_network(path: Path) -> DiscreteBayesianNetwork:
+    """Parses a network file with pgmpy's reader for its format (slow path)."""
+    kind = EXTENSIONS.get(path.suffix.lower())
+    if kind is None:
+        raise ValueError(f"Unsupported network file {path} (expected {', '.join(sorted(EXTENSIONS))})")
+    if kind == "bif":
+        from pgmpy.readwrite import BIFReader
+        model = BIFReader(str(path)).get_model()
+    elif kind == "xmlbif":
+        from pgmpy.readwrite import XMLBIFReader
+        model = XMLBIFReader(str(path)).get_model()
+    else:
+        from pgmpy.readwrite import UAIReader
+        model = UAIReader(str(path)).get_model()
+    if not isinstance(model, DiscreteBayesianNetwork):
+        raise ValueError(f"{path} is not a Bayesian network")
+    return model
+
+
+# --- Compiled cache ---
+
+def _cache_path(path: Path, cache_dir: Optional[str] = None) -> Path:
+    """Compiled copy of `path` for its current contents."""
+    digest = hashlib.sha256(path.read_bytes()).hexdigest()[:16]
+    cache_dir = Path(cache_dir or os.environ.get("NETWORK_CACHE_DIR", DEFAULT_CACHE_DIR))
+    return cache_dir / f"{path.stem}-{digest}.npz"
+
+
+def save_compiled(model: DiscreteBayesianNetwork, target: Path) -> None:
+    """Writes the model's structure, CPTs and state names to one .npz file."""
+    variables = list(model.nodes())
+    index = {var: i for i, var in enumerate(variables)}
+    cpds = {cpd.variable: cpd for cpd in model.get_cpds()}
+    parents: List[int] = []
+    parent_offsets = [0]
+    values: List[np.ndarray] = []
+    value_offsets = [0]
+    states: List[str] = []
+    state_offsets = [0]
+    named: List[bool] = []  # False: default names 0 .. card-1 (kept as ints)
+    for var in variables:
+        cpd = cpds[var]
+        parents += [index[p] for p in cpd.variables[1:]]
+        parent_offsets.append(len(parents))
+        flat = np.asarray(cpd.get_values(), dtype=float).ravel()
+        values.append(flat)
+        value_offsets.append(value_offsets[-1] + flat.size)
+        names = cpd_state_names(cpd)
+        states += [str(name) for name in names]
+        state_offsets.append(len(states))
+        named.append(names != list(range(len(names))))
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    partial = target.with_name(target.name + ".tmp.npz")
+    np.savez_compressed(
+        partial,
+        format=np.array(CACHE_FORMAT),
+        variables=np.array(variables, dtype=str),
+        parents=np.array(parents, dtype=np.int64),
+        parent_offsets=np.array(parent_offsets, dtype=np.int64),
+        values=np.concatenate(values) if values else np.zeros(0),
+        value_offsets=np.array(value_offsets, dtype=np.int64),
+        states=np.array(states, dtype=str),
+        state_offsets=np.array(state_offsets, dtype=np.int64),
+        named=np.array(named, dtype=bool),
+    )
+    os.replace(partial, target)  # readers never see a half-written cache
+
+
+def read_compiled_structure(source: Path) -> Tuple[List[str], List[Tuple[str, str]]]:
+    """
+    Variables and edges of a model written by save_compiled. Only the index
+    arrays are decompressed, not the CPTs.
+    """
+    with np.load(source, allow_pickle=False) as data:
+        if int(data["format"]) != CACHE_FORMAT:
+            raise ValueError(f"{source} has cache format {int(data['format'])}, expected {CACHE_FORMAT}")
+        variables = [str(v) for v in data["variables"]]
+        parents, parent_offsets = data["parents"], data["parent_offsets"]
+    edges = [
+        (variables[p], var)
+        for i, var in enumerate(variables)
+        for p in parents[parent_offsets[i]:parent_offsets[i + 1]]
+    ]
+    return variables, edges
+
+
+def load_compiled(source: Path) -> DiscreteBayesianNetwork:
+    """Rebuilds a model written by save_compiled."""
+    with np.load(source, allow_pickle=False) as data:
+        if int(data["format"]) != CACHE_FORMAT:
+            raise ValueError(f"{source} has cache format {int(data['format'])}, expected {CACHE_FORMAT}")
+        variables = [str(v) for v in data["variables"]]
+        parents, parent_offsets = data["parents"], data["parent_offsets"]
+        values, value_offsets = data["values"], data["value_offsets"]
+        states, state_offsets = [str(s) for s in data["states"]], data["state_offsets"]
+        named = data["named"]
+
+    names = {var: states[state_offsets[i]:state_offsets[i + 1]] for i, var in enumerate(variables)}
+    custom = {var for i, var in enumerate(variables) if named[i]}
+    model = DiscreteBayesianNetwork()
+    model.add_nodes_from(variables)
+    cpds = []
+    for i, var in enumerate(variables):
+        evidence = [variables[p] for p in parents[parent_offsets[i]:parent_offsets[i + 1]]]
+        model.add_edges_from((parent, var) for parent in evidence)
+        card = len(names[var])
+        table = values[value_offsets[i]:value_offsets[i + 1]].reshape(card, -1)
+        if table.shape[1] != math.prod(len(names[p]) for p in evidence):
+            raise ValueError(f"{source}: CPT of {var} does not match its parents")
+        cpds.append(TabularCPD(
+            variable=var,
+            variable_card=card,
+            values=table,
+            evidence=evidence or None,
+            evidence_card=[len(names[p]) for p in evidence] or None,
+            state_names={v: names[v] for v in [var] + evidence if v in custom},
+        ))
+    # Valid by construction (written from a checked model); add_cpds would
+    # compare every CPD with every other one, see create_random_network.
+    model.cpds.extend(cpds)
+    return model
+
+
+def load_network(path, cache_dir: Optional[str] = None) -> DiscreteBayesianNetwork:
+    """
+    Loads a network file, from its compiled copy when one exists for the
+    file's current contents, parsing (and caching) it otherwise.
+    """
+    path = Path(path)
+    compiled = _cache_path(path, cache_dir)
+    if compiled.exists():
+        try:
+            return load_compiled(compiled)
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            pass  # unreadable or outdated cache: parse again and overwrite it
+    model = parse_network(path)
+    try:
+        save_compiled(model, compiled)
+    except OSError as e:
+        print(f"WARNING: could not cache {path} at {compiled}: {e}")
+    return model
+
+
+def network_structure(path, cache_dir: Optional[str] = None) -> Tuple[List[str], List[Tuple[str, str]]]:
+    """
+    Variables and edges of a network file, read from its compiled copy
+    without building the model; the file is loaded (and compiled) only when
+    no usable copy exists yet.
+    """
+    path = Path(path)
+    compiled = _cache_path(path, cache_dir)
+    if compiled.exists():
+        try:
+            return read_compiled_structure(compiled)
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            pass
+    model = load_network(path, cache_dir)
+    return list(model.nodes()), list(model.edges())
+
+
+def network_files(text: Optional[str] = None) -> List[Path]:
+    """Files listed in `text` (default: $NETWORK_FILES); directories are expanded."""
+    text = os.environ.get("NETWORK_FILES", "") if text is None else text
+    files: List[Path] = []
+    for part in (p.strip() for p in text.split(",")):
+        if not part:
+            continue
+        path = Path(part)
+        if path.is_dir():
+            files += sorted(f for f in path.iterdir() if f.suffix.lower() in EXTENSIONS)
+        else:
+            files.append(path)
+    return files
+
+
+def file_networks(text: Optional[str] = None) -> Dict[str, Callable[[], DiscreteBayesianNetwork]]:
+    """Registry name -> loader of every network listed in `text` (default: $NETWORK_FILES)."""
+    loaders = {}
+    for path in network_files(text):
+        # Named after its variable count, read from the compiled copy's header.
+        variables, _ = network_structure(path)
+        loaders[network_name(path, len(variables))] = partial(load_network, path)
+    return loaders
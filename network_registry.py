@@ -0,0 +1,128 @@
+"""
+Network Registry
+Process-wide, read-only catalogue of the Bayesian networks served by the API.
+
+Models are built and validated once (at server startup) instead of on every
+request; handlers only perform dictionary lookups. `reload()` rebuilds the
+catalogue and swaps it in atomically, bumping `version` so that anything
+cached per model (compiled engines, results) can be invalidated.
+"""
+
+import threading
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from pgmpy.models import DiscreteBayesianNetwork
+
+from experiment_utils import get_all_networks
+from state_names import cpd_state_names
+
+
+def summarize_network(model: DiscreteBayesianNetwork) -> Dict[str, Any]:
+    """Structural summary of a model (nodes, edges, CPT sizes, state counts and names)."""
+    cpt_sizes: Dict[str, int] = {}
+    state_counts: Dict[str, int] = {}
+    names: Dict[str, List[str]] = {}
+    total_cpt_entries = 0
+
+    # One pass over the CPDs; model.get_cpds(node) scans them all per call.
+    cpds = {cpd.variable: cpd for cpd in model.get_cpds()}
+    for node in model.nodes():
+        cpd = cpds.get(node)
+        if cpd is None:
+            continue
+        try:
+            size = int(cpd.values.size)
+        except Exception:
+            size = 0
+        cpt_sizes[node] = size
+        try:
+            state_counts[node] = int(getattr(cpd, "variable_card", 0) or 0)
+        except Exception:
+            state_counts[node] = 0
+        names[node] = [str(name) for name in cpd_state_names(cpd)]
+        total_cpt_entries += size
+
+    return {
+        "variables": list(model.nodes()),
+        "nodes": list(model.nodes()),
+        "edges": [list(edge) for edge in model.edges()],
+        "cpt_sizes": cpt_sizes,
+        "state_counts": state_counts,
+        "state_names": names,
+        "total_cpt_entries": total_cpt_entries,
+    }
+
+
+class NetworkRegistry:
+    """Immutable name -> model mapping, populated once and swapped on reload."""
+
+    def __init__(self, factory: Callable[[], Dict[str, DiscreteBayesianNetwork]] = get_all_networks):
+        self._factory = factory
+        self._lock = threading.Lock()
+        # (networks, summaries), replaced as one object so readers see a matching pair
+        self._catalogue: Tuple[Mapping[str, DiscreteBayesianNetwork], Mapping[str, Dict[str, Any]]] = (
+            MappingProxyType({}), MappingProxyType({}))
+        self._reload_hooks: List[Callable[[int], None]] = []
+        self.version = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self.version > 0
+
+    def load(self) -> None:
+        """Builds the catalogue if it has not been built yet."""
+        if not self.loaded:
+            with self._lock:
+                if not self.loaded:
+                    self._build()
+
+    def reload(self) -> int:
+        """
+        Rebuilds every network from its factory and returns the new version.
+        Blocking: async callers should run it in a thread. Lookups keep
+        answering from the previous catalogue until the swap.
+        """
+        with self._lock:
+            self._build()
+            version = self.version
+        for hook in list(self._reload_hooks):
+            hook(version)
+        return version
+
+    def sync(self, version: int) -> None:
+        """Rebuilds the catalogue if it is older than `version` (used by worker processes)."""
+        if self.version < version:
+            with self._lock:
+                if self.version < version:
+                    self._build()
+                    self.version = version
+
+    def on_reload(self, hook: Callable[[int], None]) -> None:
+        """Registers a callback invoked with the new version after each reload."""
+        self._reload_hooks.append(hook)
+
+    def _build(self) -> None:
+        networks = dict(self._factory())
+        summaries = {name: summarize_network(model) for name, model in networks.items()}
+        # One assignment swaps both views; readers never observe a half-built catalogue.
+        self._catalogue = (MappingProxyType(networks), MappingProxyType(summaries))
+        self.version += 1
+
+    def networks(self) -> Mapping[str, DiscreteBayesianNetwork]:
+        self.load()
+        return self._catalogue[0]
+
+    def summaries(self) -> Mapping[str, Dict[str, Any]]:
+        self.load()
+        return self._catalogue[1]
+
+    def get(self, name: str) -> Optional[DiscreteBayesianNetwork]:
+        return self.networks().get(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.networks()
+
+
+# Shared instance used by the API
+registry = NetworkRegistry()
@@ -0,0 +1,90 @@
+"""
+Result Cache
+Bounded LRU + TTL cache for deterministic (exact) inference results.
+
+Exact posteriors depend only on (network, model version, query, evidence),
+so repeated UI toggles can be answered from memory without touching the
+worker pool. Keys are built with `canonical_key`, which sorts evidence so
+{"A": 1, "B": 0} and {"B": 0, "A": 1} hit the same entry.
+
+Configuration (environment variables):
+  RESULT_CACHE_SIZE   maximum number of entries (default: 1024, 0 disables)
+  RESULT_CACHE_TTL_S  seconds an entry stays valid (default: 600, 0 = no expiry)
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Mapping, Optional, Tuple
+
+
+def canonical_key(network: str, version: int, kind: str, query: Optional[str],
+                  evidence: Mapping[str, Any]) -> Tuple:
+    """Order-independent cache key for a query."""
+    return (network, version, kind, query, tuple(sorted(evidence.items())))
+
+
+class ResultCache:
+    """Thread-safe LRU cache with optional time-to-live and hit/miss counters."""
+
+    def __init__(self, maxsize: int = 1024, ttl_s: float = 600.0):
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> "ResultCache":
+        return cls(
+            maxsize=int(os.environ.get("RESULT_CACHE_SIZE", "1024")),
+            ttl_s=float(os.environ.get("RESULT_CACHE_TTL_S", "600")),
+        )
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_s > 0 and time.monotonic() - entry[0] > self.ttl_s:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            return entry[1] if entry is not None else None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_s": self.ttl_s,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -1,114 +1,173 @@
 """
 EXPERIMENT 1: Runtime Comparison
-Measures execution time of VE vs Gibbs across different networks.
+Measures execution time of VE, einsum and Gibbs across different networks,
+phase by phase:
+
+  build     constructing the pgmpy model (network factory / file loader)
+  compile   engine construction plus the plan for the query signature
+  evidence  state names -> indices and engine-specific evidence reduction
+  query     the inference itself (elimination, contraction or sampling)
+  marshal   probabilities -> labelled JSON, as the API returns them
+
+Every trial rebuilds the model and recompiles each engine, so all engines
+pay for the same phases. Timings use time.perf_counter_ns; the first
+`--warmup` trials are run but not recorded. Gibbs trial k samples with the
+k-th seed spawned from `--seed`, so a rerun draws the same chains. The
+"per_query" phase is evidence + query + marshal -- the cost of one request
+against a compiled engine -- and is what the speedup compares.
 """
 
 import argparse
+import contextlib
+import io
+import json
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
+from einsum_engine import EinsumEngine
+from engine_cache import CompiledVE
+from gibbs_sampler import GibbsSampler
+from state_names import encode_evidence, label_distribution, state_labels
 from experiment_utils import (
-    get_all_networks, 
-    get_network_queries, 
-    run_exact_inference, 
-    run_gibbs_inference,
+    get_network_factories,
+    get_network_queries,
+    PhaseTimer,
+    trial_seeds,
     setup_plot_style,
     save_plot,
     save_results
 )
-import time
-from pgmpy.inference import VariableElimination
+
+ENGINES = ("ve", "einsum", "gibbs")
+PHASES = ("compile", "evidence", "query", "marshal", "per_query")
+LABELS = {"ve": "Variable Elimination", "einsum": "Einsum", "gibbs": "Gibbs Sampling"}
+COLORS = {"ve": "#3b82f6", "einsum": "#06b6d4", "gibbs": "#8b5cf6"}
+
+
+def marshal(model, query_var, values) -> str:
+    return json.dumps(label_distribution(values, state_labels(model, query_var)))
+
+
+def time_engine(engine, model, query_var, evidence, args, timer: PhaseTimer, seed: int) -> None:
+    """One compile + query of `engine`, each phase timed into `timer` as "<engine>:<phase>"."""
+    phase = lambda name: timer.phase(f"{engine}:{name}")
+
+    if engine == "ve":
+        with phase("compile"):
+            ve = CompiledVE(model)
+            plan = ve.plan([query_var], evidence.keys())
+        reduce = lambda: ve.reduce(plan, encode_evidence(model, evidence))
+        infer = lambda reduced: ve.run(plan, [query_var], reduced).values
+    elif engine == "einsum":
+        with phase("compile"):
+            einsum = EinsumEngine(model)
+            plan = einsum.plan([query_var], frozenset(evidence))
+        reduce = lambda: einsum.operands(plan, encode_evidence(model, evidence))
+        infer = lambda operands: einsum.contract(plan, operands)
+    else:
+        with phase("compile"):
+            sampler = GibbsSampler(model)
+        reduce = lambda: encode_evidence(model, evidence)
+
+        def infer(indices):
+            if args.jobs == 1:
+                counts = sampler.sample_counts(query_var, indices, args.samples, rng=np.random.default_rng(seed))
+            else:
+                counts = sampler.sample_counts_parallel([query_var], indices, args.samples, args.jobs,
+                                                        seed=seed)[query_var]
+            return counts / counts.sum()
+
+    with phase("per_query"):
+        with phase("evidence"):
+            reduced = reduce()
+        with phase("query"):
+            values = infer(reduced)
+        with phase("marshal"):
+            marshal(model, query_var, values)
+
 
 def main():
     parser = argparse.ArgumentParser(description="Run Experiment 1: Runtime Comparison")
-    parser.add_argument("--trials", type=int, default=10, help="Number of trials per network")
+    parser.add_argument("--trials", type=int, default=10, help="Recorded trials per network")
+    parser.add_argument("--warmup", type=int, default=3, help="Unrecorded warm-up trials per network")
     parser.add_argument("--samples", type=int, default=10000, help="Number of samples for Gibbs")
+    parser.add_argument("--jobs", type=int, default=1, help="Processes per Gibbs run (-1 = all cores)")
+    parser.add_argument("--seed", type=int, default=0, help="Base seed for the Gibbs trials")
+    parser.add_argument("--engines", default=",".join(ENGINES), help="Comma-separated engines to time")
     args = parser.parse_args()
+    engines = [e.strip() for e in args.engines.split(",") if e.strip()]
+    unknown = set(engines) - set(ENGINES)
+    if unknown:
+        parser.error(f"unknown engines: {', '.join(sorted(unknown))} (choose from {', '.join(ENGINES)})")
 
     print("="*60)
-    print(f"EXPERIMENT 1: RUNTIME COMPARISON (Trials={args.trials}, Samples={args.samples})")
+    print(f"EXPERIMENT 1: RUNTIME COMPARISON (Trials={args.trials}, Warm-up={args.warmup}, Samples={args.samples})")
     print("="*60)
 
-    networks = get_all_networks()
+    factories = get_network_factories()
     queries = get_network_queries()
-    
-    results = {
-        'Network': [],
-        'Variables': [],
-        'VE_Time_Mean': [],
-        'VE_Time_Std': [],
-        'Gibbs_Time_Mean': [],
-        'Gibbs_Time_Std': [],
-        'Speedup': []
-    }
-
-    for network_name, model in networks.items():
+
+    rows = []
+    for network_name, build in factories.items():
         print(f"Testing: {network_name}")
-        query_var, evidence, target_state = queries[network_name]
-        
-        # 1. Variable Elimination Timing
-        ve_times = []
-        for _ in range(args.trials):
-            start = time.time()
-            ve = VariableElimination(model)
-            ve.query([query_var], evidence=evidence, show_progress=False)
-            ve_times.append(time.time() - start)
-            
-        # 2. Gibbs Sampling Timing
-        gibbs_times = []
-        for _ in range(args.trials):
-            _, duration = run_gibbs_inference(model, query_var, evidence, args.samples, target_state)
-            gibbs_times.append(duration)
-            
-        # Statistics
-        ve_mean = np.mean(ve_times)
-        ve_std = np.std(ve_times)
-        gibbs_mean = np.mean(gibbs_times)
-        gibbs_std = np.std(gibbs_times)
-        speedup = gibbs_mean / ve_mean if ve_mean > 0 else 0
-        
-        results['Network'].append(network_name)
-        results['Variables'].append(len(model.nodes()))
-        results['VE_Time_Mean'].append(ve_mean)
-        results['VE_Time_Std'].append(ve_std)
-        results['Gibbs_Time_Mean'].append(gibbs_mean)
-        results['Gibbs_Time_Std'].append(gibbs_std)
-        results['Speedup'].append(speedup)
-        
-        print(f"  VE:    {ve_mean*1000:.2f} ± {ve_std*1000:.2f} ms")
-        print(f"  Gibbs: {gibbs_mean*1000:.2f} ± {gibbs_std*1000:.2f} ms")
-        print(f"  Speedup: {speedup:.1f}x (Gibbs is slower)" if speedup > 1 else f"  Speedup: {1/speedup:.1f}x (Gibbs is faster)")
+        query_var, evidence, _ = queries[network_name]
+        timer = PhaseTimer()
+        seeds = trial_seeds(args.warmup + args.trials, args.seed)
+        for trial in range(args.warmup + args.trials):
+            timer.recording = trial >= args.warmup
+            with contextlib.redirect_stdout(io.StringIO()):  # factories print progress
+                with timer.phase("model:build"):
+                    model = build()
+            for engine in engines:
+                time_engine(engine, model, query_var, evidence, args, timer, seeds[trial])
+
+        n_vars = len(model.nodes())
+        rows.append({'Network': network_name, 'Variables': n_vars, 'Engine': 'model', 'Phase': 'build',
+                     **timer.stats("model:build")})
+        for engine in engines:
+            for phase in PHASES:
+                rows.append({'Network': network_name, 'Variables': n_vars, 'Engine': engine, 'Phase': phase,
+                             **timer.stats(f"{engine}:{phase}")})
+            compile_p50 = timer.stats(f"{engine}:compile")['P50_ms']
+            query = timer.stats(f"{engine}:per_query")
+            print(f"  {engine:7s} compile {compile_p50:9.3f} ms | per query p50 {query['P50_ms']:9.3f}"
+                  f"  p90 {query['P90_ms']:9.3f}  p99 {query['P99_ms']:9.3f} ms")
+        if "ve" in engines and "gibbs" in engines:
+            ratio = timer.stats("gibbs:per_query")['P50_ms'] / timer.stats("ve:per_query")['P50_ms']
+            print(f"  Speedup (per query, p50): {ratio:.1f}x (Gibbs is slower)" if ratio > 1
+                  else f"  Speedup (per query, p50): {1/ratio:.1f}x (Gibbs is faster)")
         print()
 
     # Save Results
-    df = pd.DataFrame(results)
+    df = pd.DataFrame(rows)
     save_results(df, 'runtime_results.csv')
 
     # Plotting
     setup_plot_style()
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 5))
-    
-    # Plot 1: Execution Time
-    x = np.arange(len(df))
-    width = 0.35
-    
-    bars1 = ax1.bar(x - width/2, df['VE_Time_Mean']*1000, width, label='Variable Elimination', color='#3b82f6')
-    bars2 = ax1.bar(x + width/2, df['Gibbs_Time_Mean']*1000, width, label='Gibbs Sampling', color='#8b5cf6')
-    
-    ax1.set_ylabel('Execution Time (ms)')
-    ax1.set_title('Runtime Comparison')
-    ax1.set_xticks(x)
-    ax1.set_xticklabels(df['Variables'])
-    ax1.set_xlabel('Network Size (Variables)')
-    ax1.legend()
-    
-    # Plot 2: Speedup
-    ax2.bar(df['Variables'], df['Speedup'], color='#10b981', edgecolor='black')
-    ax2.axhline(y=1, color='red', linestyle='--')
-    ax2.set_ylabel('Ratio (Gibbs Time / VE Time)')
-    ax2.set_title('Relative Performance (Higher = VE Faster)')
-    ax2.set_xlabel('Network Size (Variables)')
-    
+    networks = list(dict.fromkeys(df['Network']))
+    x = np.arange(len(networks))
+    width = 0.8 / len(engines)
+
+    # Plot 1: per-query time (bar: p50, whisker: p90); Plot 2: compile time (p50)
+    for k, engine in enumerate(engines):
+        offset = (k - (len(engines) - 1) / 2) * width
+        per_query = df[(df['Engine'] == engine) & (df['Phase'] == 'per_query')].set_index('Network').loc[networks]
+        compile_ = df[(df['Engine'] == engine) & (df['Phase'] == 'compile')].set_index('Network').loc[networks]
+        ax1.bar(x + offset, per_query['P50_ms'], width, label=LABELS[engine], color=COLORS[engine],
+                yerr=[np.zeros(len(x)), per_query['P90_ms'] - per_query['P50_ms']], capsize=3)
+        ax2.bar(x + offset, compile_['P50_ms'], width, label=LABELS[engine], color=COLORS[engine])
+
+    variables = df.drop_duplicates('Network').set_index('Network').loc[networks, 'Variables']
+    for ax, title in ((ax1, 'Per-Query Time (p50, whisker p90)'), (ax2, 'Engine Compile Time (p50)')):
+        ax.set_yscale('log')
+        ax.set_ylabel('Time (ms)')
+        ax.set_title(title)
+        ax.set_xticks(x)
+        ax.set_xticklabels(variables)
+        ax.set_xlabel('Network Size (Variables)')
+        ax.legend()
+
     save_plot('runtime_comparison.png')
     print("\nExperiment 1 Complete!")
 
@@ -1,6 +1,11 @@
 """
 EXPERIMENT 2: Accuracy Comparison
 Measures Mean Absolute Error (MAE) of Gibbs Sampling vs Exact Inference (VE).
+
+All Gibbs trials (every network x trial) are fanned out over `--workers`
+processes by run_trials; each trial gets its own seed spawned from `--seed`
+and results come back in task order, so the tables are reproducible and do
+not depend on the worker count.
 """
 
 import argparse
@@ -11,16 +16,22 @@ from experiment_utils import (
     get_all_networks, 
     get_network_queries, 
     run_exact_inference, 
-    run_gibbs_inference,
+    gibbs_trial,
+    run_trials,
     setup_plot_style,
     save_plot,
-    save_results
+    save_results,
+    mean_of,
+    max_of
 )
 
 def main():
     parser = argparse.ArgumentParser(description="Run Experiment 2: Accuracy Comparison")
     parser.add_argument("--trials", type=int, default=10, help="Number of trials per network")
     parser.add_argument("--samples", type=int, default=10000, help="Number of samples for Gibbs")
+    parser.add_argument("--jobs", type=int, default=1, help="Processes per Gibbs run (-1 = all cores)")
+    parser.add_argument("--seed", type=int, default=0, help="Base seed the trial seeds are spawned from")
+    parser.add_argument("--workers", type=int, default=-1, help="Processes running trials (-1 = all cores)")
     args = parser.parse_args()
 
     print("="*60)
@@ -36,24 +47,32 @@ def main():
         'VE_Prob': [],
         'Gibbs_Prob_Mean': [],
         'MAE': [],
-        'Error_Std': []
+        'Error_Std': [],
+        'ESS_Mean': [],
+        'R_hat_Max': [],
+        'IAT_Mean': [],
+        'MCSE_Mean': []
     }
 
+    # 1. Approximate Inference: every (network, trial) pair in one pool
+    tasks = []
     for network_name, model in networks.items():
+        query_var, evidence, target_state = queries[network_name]
+        tasks += [(model, query_var, evidence, args.samples, target_state, args.jobs)] * args.trials
+    trials = run_trials(gibbs_trial, tasks, workers=args.workers, seed=args.seed, label="Gibbs trials")
+
+    for k, (network_name, model) in enumerate(networks.items()):
         print(f"Testing: {network_name}")
         query_var, evidence, target_state = queries[network_name]
         
-        # 1. Exact Inference
+        # 2. Exact Inference
         ve_prob = run_exact_inference(model, query_var, evidence, target_state)
         print(f"  Exact Probability (VE): {ve_prob:.4f}")
         
-        # 2. Approximate Inference
-        probs = []
-        errors = []
-        for _ in range(args.trials):
-            gibbs_prob, _ = run_gibbs_inference(model, query_var, evidence, args.samples, target_state)
-            probs.append(gibbs_prob)
-            errors.append(abs(ve_prob - gibbs_prob))
+        network_trials = trials[k * args.trials:(k + 1) * args.trials]
+        probs = [prob for prob, _ in network_trials]
+        diagnostics = [summary for _, summary in network_trials]
+        errors = [abs(ve_prob - prob) for prob in probs]
             
         gibbs_mean = np.mean(probs)
         mae = np.mean(errors)
@@ -65,9 +84,14 @@ def main():
         results['Gibbs_Prob_Mean'].append(gibbs_mean)
         results['MAE'].append(mae)
         results['Error_Std'].append(error_std)
+        results['ESS_Mean'].append(mean_of(diagnostics, 'ess'))
+        results['R_hat_Max'].append(max_of(diagnostics, 'r_hat'))
+        results['IAT_Mean'].append(mean_of(diagnostics, 'iat'))
+        results['MCSE_Mean'].append(mean_of(diagnostics, 'mcse'))
         
         print(f"  Gibbs Mean Prob: {gibbs_mean:.4f}")
-        print(f"  MAE: {mae:.4f} ± {error_std:.4f}\n")
+        print(f"  MAE: {mae:.4f} ± {error_std:.4f}")
+        print(f"  ESS: {results['ESS_Mean'][-1]:.0f}  R-hat: {results['R_hat_Max'][-1]:.4f}\n")
 
     # Save Results
     df = pd.DataFrame(results)
@@ -1,6 +1,18 @@
 """
 EXPERIMENT 3: Convergence Study
 Tests how Gibbs accuracy improves with increasing sample size.
+
+Two modes (`--mode`):
+  prefix       (default) each trial runs one chain to the largest size and
+               reads the running estimate as it goes, so every sample size
+               is a prefix of the same run: 25,000 samples per trial instead
+               of 44,100, and a continuous curve (a reading every
+               `--report-every` samples) besides the checkpoint table
+  independent  a fresh run per (sample size, trial), as before; errors at
+               different sizes are then independent of each other
+
+Trials are fanned out over `--workers` processes by run_trials, each with
+its own seed spawned from `--seed`; results come back in task order.
 """
 
 import argparse
@@ -10,19 +22,31 @@ import matplotlib.pyplot as plt
 from experiment_utils import (
     create_alarm_network, 
     run_exact_inference, 
-    run_gibbs_inference,
+    gibbs_prefix_trial,
+    gibbs_trial,
+    run_trials,
     setup_plot_style,
     save_plot,
-    save_results
+    save_results,
+    mean_of,
+    max_of
 )
 
 def main():
     parser = argparse.ArgumentParser(description="Run Experiment 3: Convergence Study")
     parser.add_argument("--trials", type=int, default=10, help="Number of trials per sample size")
+    parser.add_argument("--mode", choices=("prefix", "independent"), default="prefix",
+                        help="One chain read at every size, or a fresh run per size")
+    parser.add_argument("--report-every", type=int, default=50, help="Samples between curve readings (prefix)")
+    parser.add_argument("--jobs", type=int, default=1, help="Processes per Gibbs run (-1 = all cores, independent)")
+    parser.add_argument("--seed", type=int, default=0, help="Base seed the trial seeds are spawned from")
+    parser.add_argument("--workers", type=int, default=-1, help="Processes running trials (-1 = all cores)")
     args = parser.parse_args()
+    if args.mode == "prefix" and args.jobs != 1:
+        parser.error("--jobs applies to --mode independent only (prefix runs are read as they go)")
 
     print("="*60)
-    print(f"EXPERIMENT 3: CONVERGENCE STUDY (Trials={args.trials})")
+    print(f"EXPERIMENT 3: CONVERGENCE STUDY (Trials={args.trials}, Mode={args.mode})")
     print("="*60)
 
     # Use Alarm network
@@ -40,20 +64,41 @@ def main():
     
     results = {
         'Sample_Size': [], 'Mean_Probability': [], 'Std_Probability': [],
-        'Mean_Error': [], 'Std_Error': []
+        'Mean_Error': [], 'Std_Error': [],
+        'ESS_Mean': [], 'R_hat_Max': [], 'IAT_Mean': [], 'MCSE_Mean': []
     }
     
+    curve = None
+    if args.mode == "prefix":
+        tasks = [(model, query_var, evidence, sample_sizes, target_state, args.report_every)] * args.trials
+        trials = run_trials(gibbs_prefix_trial, tasks, workers=args.workers, seed=args.seed,
+                            label="Gibbs chains")
+        readings = trials[0][0]  # same schedule in every trial
+        estimates = np.array([running for _, running, _ in trials])
+        errors = np.abs(estimates - exact_prob)
+        curve = pd.DataFrame({
+            'Samples': readings,
+            'Mean_Probability': estimates.mean(axis=0), 'Std_Probability': estimates.std(axis=0),
+            'Mean_Error': errors.mean(axis=0), 'Std_Error': errors.std(axis=0),
+        })
+        # Checkpoint k is read at the first reading at or after it
+        at = [int(np.searchsorted(readings, size)) for size in sample_sizes]
+        by_size = [[(running[i], summaries[k]) for _, running, summaries in trials]
+                   for k, i in enumerate(at)]
+        print(f"  {max(sample_sizes):,} samples per trial (vs {sum(sample_sizes):,} with independent runs)")
+    else:
+        tasks = [(model, query_var, evidence, size, target_state, args.jobs)
+                 for size in sample_sizes for _ in range(args.trials)]
+        trials = run_trials(gibbs_trial, tasks, workers=args.workers, seed=args.seed, label="Gibbs trials")
+        by_size = [trials[k * args.trials:(k + 1) * args.trials] for k in range(len(sample_sizes))]
+
     print("Testing sample sizes...")
-    for size in sample_sizes:
+    for size, size_trials in zip(sample_sizes, by_size):
         print(f"  {size:,} samples...", end='', flush=True)
         
-        probs = []
-        errors = []
-        
-        for _ in range(args.trials):
-            prob, _ = run_gibbs_inference(model, query_var, evidence, size, target_state)
-            probs.append(prob)
-            errors.append(abs(prob - exact_prob))
+        probs = [prob for prob, _ in size_trials]
+        errors = [abs(prob - exact_prob) for prob in probs]
+        diagnostics = [summary for _, summary in size_trials]
             
         mean_prob = np.mean(probs)
         std_prob = np.std(probs)
@@ -65,17 +110,30 @@ def main():
         results['Std_Probability'].append(std_prob)
         results['Mean_Error'].append(mean_error)
         results['Std_Error'].append(std_error)
+        results['ESS_Mean'].append(mean_of(diagnostics, 'ess'))
+        results['R_hat_Max'].append(max_of(diagnostics, 'r_hat'))
+        results['IAT_Mean'].append(mean_of(diagnostics, 'iat'))
+        results['MCSE_Mean'].append(mean_of(diagnostics, 'mcse'))
         
         print(f" Error: {mean_error:.6f} ± {std_error:.6f}")
         
     # Save Results
     df = pd.DataFrame(results)
     save_results(df, 'convergence_results.csv')
+    if curve is not None:
+        save_results(curve, 'convergence_curve.csv')
     
     # Plotting
     setup_plot_style()
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 5))
     
+    # Prefix mode: the continuous running curves (mean ± std band) under the checkpoints
+    if curve is not None:
+        for ax, column, color in ((ax1, 'Probability', '#3b82f6'), (ax2, 'Error', '#ef4444')):
+            mean, std = curve[f'Mean_{column}'], curve[f'Std_{column}']
+            ax.plot(curve['Samples'], mean, linewidth=1, color=color, alpha=0.7)
+            ax.fill_between(curve['Samples'], (mean - std).clip(lower=0), mean + std, color=color, alpha=0.15)
+    
     # Plot 1: Probability vs Samples
     ax1.errorbar(df['Sample_Size'], df['Mean_Probability'], yerr=df['Std_Probability'], 
                  fmt='o-', linewidth=2, markersize=8, capsize=5, label='Gibbs Estimate', color='#3b82f6')
@@ -0,0 +1,245 @@
+"""
+EXPERIMENT 4: Scaling
+Runs every engine on generated networks from tens to thousands of variables
+(synthetic_network.py) to show how time, memory and accuracy scale with
+network size and treewidth.
+
+Topologies differ in treewidth: chain / tree / polytree have width 1, grid
+~sqrt(n), layered grows with its layer width and in-degree. Each (network,
+engine) pair answers the network's standard query once, cold (engine
+construction included), in a child process that is killed after `--timeout`
+seconds and may map `--max-memory-mb` of address space beyond what it
+inherited from the fork; a run that fails is recorded as "timeout" (still
+running at the deadline) or "error" (an exception, or a child that died
+with the given exit code) instead of stopping the sweep. Peak
+memory is the tracemalloc high-water mark of the run (tracing slows
+allocation-heavy code a little; pass --no-memory for clean timings). Error
+is the largest absolute difference from the exact posterior (the first
+exact engine that finished). `--seed` fixes both the generated networks and
+the samplers' draws.
+"""
+
+import argparse
+import contextlib
+import io
+import multiprocessing as mp
+import resource
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from networkx.algorithms.approximation import treewidth_min_fill_in
+from einsum_engine import EinsumEngine
+from engine_cache import CompiledVE
+from forward_sampling import ForwardSampler
+from gibbs_sampler import GibbsSampler
+from junction_tree import JunctionTreeEngine
+from synthetic_network import NetworkSpec, TOPOLOGIES, create_random_network, default_query, random_dag
+from experiment_utils import (
+    setup_plot_style,
+    save_plot,
+    save_results
+)
+import networkx as nx
+
+EXACT_ENGINES = ("einsum", "ve", "jt")  # reference order for the error column
+ENGINES = ("ve", "jt", "einsum", "gibbs", "lw", "rejection")
+COLORS = {"ve": "#3b82f6", "jt": "#f59e0b", "einsum": "#06b6d4",
+          "gibbs": "#8b5cf6", "lw": "#10b981", "rejection": "#ef4444"}
+
+
+def infer(engine: str, model, query_var: str, evidence: dict, samples: int,
+          rng: np.random.Generator) -> np.ndarray:
+    """One cold query: builds `engine` on `model` and returns the posterior (samplers draw from `rng`)."""
+    if engine == "ve":
+        return CompiledVE(model).query([query_var], evidence).values
+    if engine == "jt":
+        return JunctionTreeEngine(model).query(query_var, evidence)
+    if engine == "einsum":
+        return EinsumEngine(model).query([query_var], evidence)
+    if engine == "gibbs":
+        weights = GibbsSampler(model).sample_counts(query_var, evidence, samples, rng=rng)
+    elif engine == "lw":
+        weights, _ = ForwardSampler(model).likelihood_weighting(query_var, evidence, samples, rng)
+    else:
+        weights, _ = ForwardSampler(model).rejection(query_var, evidence, samples, rng)
+    total = weights.sum()
+    return weights / total if total > 0 else np.full(len(weights), np.nan)
+
+
+def _address_space() -> int:
+    """Bytes of address space this process already maps (VmSize; 0 if unknown)."""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmSize:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def _child(spec, engine, samples, track_memory, max_memory_mb, results) -> None:
+    """Process entry point: builds the network, runs one engine, reports back."""
+    try:
+        if max_memory_mb:
+            # The fork inherits the parent's imports; the budget is on top of them.
+            limit = _address_space() + max_memory_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        with contextlib.redirect_stdout(io.StringIO()):
+            model = create_random_network(spec)
+        query_var, evidence, _ = default_query(spec)
+        if track_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        # Keys 0 and 1 of spec.seed drew the network's DAG and CPTs
+        # (synthetic_network.py); the sampler gets its own stream.
+        posterior = infer(engine, model, query_var, evidence, samples, np.random.default_rng([spec.seed, 2]))
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if track_memory else None
+        outcome = ("ok", elapsed, peak, np.asarray(posterior, dtype=float).ravel(), None)
+    except MemoryError:
+        outcome = ("error", None, None, None, "out of memory")
+    except Exception as e:
+        outcome = ("error", None, None, None, f"{type(e).__name__}: {e}")
+    # A pipe sends from this thread: no feeder thread to start after a MemoryError.
+    results.send(outcome)
+    results.close()
+
+
+def run_isolated(spec, engine, args):
+    """
+    Runs one engine in a child process with a time and memory limit. A child
+    that dies without reporting is an "error" with its exit code; only a
+    child still running at the deadline is a "timeout".
+    """
+    reader, writer = mp.Pipe(duplex=False)
+    child = mp.Process(target=_child, args=(spec, engine, args.samples, args.memory, args.max_memory_mb, writer))
+    child.start()
+    writer.close()  # the child holds the only write end, so its death closes the pipe
+    deadline = time.monotonic() + args.timeout
+    try:
+        while True:
+            if reader.poll(min(0.1, max(0.0, deadline - time.monotonic()))):
+                try:
+                    return reader.recv()
+                except EOFError:  # the pipe closed: the child died before sending
+                    child.join()
+                    return ("error", None, None, None, f"child exited with code {child.exitcode}")
+            if time.monotonic() >= deadline:
+                return ("timeout", None, None, None, f"no result after {args.timeout:g}s")
+    finally:
+        reader.close()
+        child.join(timeout=1)
+        if child.is_alive():
+            child.kill()
+            child.join()
+
+
+def treewidth(spec) -> int:
+    """Upper bound on the treewidth of the moral graph (min-fill-in heuristic)."""
+    variables, edges = random_dag(spec)
+    parents = {var: [] for var in variables}
+    for parent, child in edges:
+        parents[child].append(parent)
+    graph = nx.Graph()
+    graph.add_nodes_from(variables)
+    for child, family in parents.items():
+        family = [child] + family
+        graph.add_edges_from((a, b) for i, a in enumerate(family) for b in family[i + 1:])
+    return treewidth_min_fill_in(graph)[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Experiment 4: Scaling")
+    parser.add_argument("--sizes", default="10,30,100,300,1000,3000", help="Comma-separated node counts")
+    parser.add_argument("--topologies", default=",".join(TOPOLOGIES), help="Comma-separated topologies")
+    parser.add_argument("--engines", default=",".join(ENGINES), help="Comma-separated engines")
+    parser.add_argument("--max-in-degree", type=int, default=3, help="Parents per variable at most")
+    parser.add_argument("--cardinality", default="2", help="States per variable: k or lo-hi")
+    parser.add_argument("--samples", type=int, default=10000, help="Samples for the sampling engines")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds per (network, engine) run")
+    parser.add_argument("--max-memory-mb", type=int, default=4096,
+                        help="Extra address space per run, on top of the forked process (0 = no limit)")
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="Skip peak-memory tracing")
+    parser.add_argument("--seed", type=int, default=0, help="Network generator and sampler seed")
+    args = parser.parse_args()
+
+    sizes = [int(n) for n in args.sizes.split(",") if n.strip()]
+    topologies = [t.strip() for t in args.topologies.split(",") if t.strip()]
+    engines = [e.strip() for e in args.engines.split(",") if e.strip()]
+    for name, chosen, allowed in (("topologies", topologies, TOPOLOGIES), ("engines", engines, ENGINES)):
+        unknown = set(chosen) - set(allowed)
+        if unknown:
+            parser.error(f"unknown {name}: {', '.join(sorted(unknown))} (choose from {', '.join(allowed)})")
+    low, _, high = args.cardinality.partition("-")
+    cardinality = (int(low), int(high or low))
+
+    print("="*60)
+    print(f"EXPERIMENT 4: SCALING (Sizes={sizes}, Samples={args.samples}, Timeout={args.timeout:g}s)")
+    print("="*60)
+
+    rows = []
+    for topology in topologies:
+        for n in sizes:
+            spec = NetworkSpec(topology, n, args.max_in_degree, cardinality, args.seed)
+            width = treewidth(spec)
+            print(f"Testing: {spec.name} (treewidth <= {width})")
+
+            outcomes = {engine: run_isolated(spec, engine, args) for engine in engines}
+            reference = next((outcomes[e][3] for e in EXACT_ENGINES if e in outcomes and outcomes[e][0] == "ok"),
+                             None)
+            for engine, (status, elapsed, peak, posterior, message) in outcomes.items():
+                error = (float(np.max(np.abs(posterior - reference)))
+                         if status == "ok" and reference is not None else float('nan'))
+                rows.append({
+                    'Topology': topology,
+                    'Variables': n,
+                    'Edges': len(random_dag(spec)[1]),
+                    'Treewidth': width,
+                    'Engine': engine,
+                    'Status': status,
+                    'Time_s': elapsed if elapsed is not None else float('nan'),
+                    'Peak_MB': peak / 2**20 if peak is not None else float('nan'),
+                    'Error': error,
+                    'Message': message or '',
+                })
+                detail = (f"{elapsed*1000:10.2f} ms"
+                          + (f"  {peak / 2**20:8.2f} MB" if peak is not None else "")
+                          + (f"  err {error:.4f}" if np.isfinite(error) else "")) if status == "ok" else message
+                print(f"  {engine:9s} {status:7s} {detail}")
+            print()
+
+    # Save Results
+    df = pd.DataFrame(rows)
+    save_results(df, 'scaling_results.csv')
+
+    # Plotting: one column per topology; time, peak memory and error rows (log-log)
+    setup_plot_style()
+    metrics = [('Time_s', 'Time (s)'), ('Peak_MB', 'Peak Memory (MB)'), ('Error', 'Max Abs Error vs Exact')]
+    fig, axes = plt.subplots(len(metrics), len(topologies), figsize=(4.5 * len(topologies), 11), squeeze=False)
+    ok = df[df['Status'] == 'ok']
+    for col, topology in enumerate(topologies):
+        for row, (metric, label) in enumerate(metrics):
+            ax = axes[row][col]
+            for engine in engines:
+                points = ok[(ok['Topology'] == topology) & (ok['Engine'] == engine)].sort_values('Variables')
+                points = points[points[metric] > 0]  # log axes; exact engines have zero error
+                if len(points):
+                    ax.plot(points['Variables'], points[metric], marker='o', label=engine, color=COLORS[engine])
+            ax.set_xscale('log')
+            ax.set_yscale('log')
+            if row == 0:
+                ax.set_title(topology.capitalize())
+            if row == len(metrics) - 1:
+                ax.set_xlabel('Network Size (Variables)')
+            if col == 0:
+                ax.set_ylabel(label)
+    axes[0][0].legend()
+
+    save_plot('scaling_comparison.png')
+    print("\nExperiment 4 Complete!")
+
+if __name__ == "__main__":
+    main()
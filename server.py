@@ -1,15 +1,64 @@
 
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse
+from contextlib import asynccontextmanager
+import asyncio
+import json
+import time
+import uuid
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
 import os
+import numpy as np
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Dict, List, Optional, Any
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional, Any, Union
 import experiment_utils as utils
-from experiment_utils import get_all_networks
+from network_registry import registry
+from engine_cache import engine_cache
+from junction_tree import JunctionTreeEngine, JunctionTreeSession
+from einsum_engine import EinsumEngine
+from elimination_order import DEFAULT_HEURISTIC, HEURISTICS, EliminationOrderer
+from forward_sampling import ForwardSampler
+from gibbs_sampler import GibbsSampler
+from worker_pool import InferencePool, PoolSaturated, PoolTimeout
+from result_cache import ResultCache, canonical_key
+from adaptive_sampling import StoppingRule, run_until
+from mcmc_diagnostics import ChainDiagnostics
+from state_names import encode_evidence, label_distribution, state_labels
 
-app = FastAPI(title="Bayesian Inference Lab", docs_url="/api/docs", redoc_url=None)
+# CPU-bound inference runs here, off the event loop (see worker_pool.py)
+pool = InferencePool.from_env()
+
+# Exact results, answered without a pool round-trip on repeat queries
+result_cache = ResultCache.from_env()
+EXACT_ALGORITHMS = ("ve", "jt", "einsum")
+
+# Interactive evidence sessions (junction-tree state kept between queries).
+# Sessions live in this process, so their queries run on threads, not the pool.
+sessions = ResultCache(
+    maxsize=int(os.environ.get("SESSION_MAX", "256")),
+    ttl_s=float(os.environ.get("SESSION_TTL_S", "1800")),
+)
+
+# Processes per Gibbs request (joblib; -1 = all cores). Defaults to 1 because
+# the inference pool already spreads concurrent requests across cores.
+GIBBS_JOBS = int(os.environ.get("GIBBS_JOBS", "1"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build and validate every network once; requests only do lookups.
+    registry.load()
+    registry.on_reload(lambda version: engine_cache.invalidate())
+    registry.on_reload(lambda version: result_cache.clear())
+    registry.on_reload(lambda version: sessions.clear())
+    pool.start()
+    yield
+    pool.shutdown()
+
+
+app = FastAPI(title="Bayesian Inference Lab", docs_url="/api/docs", redoc_url=None, lifespan=lifespan)
 
 # CORS (dev-friendly; tighten for production)
 app.add_middleware(
@@ -21,12 +70,45 @@ app.add_middleware(
 )
 
 # --- Request/Response Models ---
+# Evidence states are indices or state names, e.g. {"Grade": 2} or {"Grade": "2"}
+Evidence = Dict[str, Union[int, str]]
+
 class InferenceRequest(BaseModel):
     network: str
-    algorithm: str  # "ve" or "gibbs"
+    algorithm: str  # "ve", "jt", "einsum", "gibbs", "lw" or "rejection"
     query_var: str
-    evidence: Dict[str, int]
-    samples: Optional[int] = 10000
+    evidence: Evidence
+    samples: int = Field(10000, ge=1)
+    # VE / JT only: elimination-order heuristic (see elimination_order.py)
+    elimination: str = DEFAULT_HEURISTIC
+    # Gibbs only: sweeps discarded per chain, and keep every `thin`-th sweep
+    burn_in: int = 0
+    thin: int = 1
+    # Sampling algorithms: fixed seed for a reproducible answer (None = fresh entropy)
+    seed: Optional[int] = None
+    # Adaptive stopping (sampling algorithms): `samples` becomes the maximum budget
+    target_half_width: Optional[float] = None      # stop once every 95% CI half-width is below this
+    target_relative_error: Optional[float] = None  # ... or below this fraction of each probability
+    max_time_ms: Optional[float] = None            # ... or once this much time has been spent
+
+class StreamRequest(InferenceRequest):
+    report_every: int = Field(1000, ge=1)  # samples between progress events
+
+class BatchInferenceRequest(BaseModel):
+    items: List[InferenceRequest]
+
+class MarginalsRequest(BaseModel):
+    network: str
+    evidence: Evidence = {}
+
+class SessionRequest(BaseModel):
+    network: str
+    evidence: Evidence = {}
+    elimination: str = DEFAULT_HEURISTIC
+
+class SessionQuery(BaseModel):
+    evidence: Evidence                      # full evidence; the server applies the difference
+    variables: Optional[List[str]] = None  # posteriors to return (default: all)
 
 class NetworkInfo(BaseModel):
     name: str
@@ -35,8 +117,35 @@ class NetworkInfo(BaseModel):
     edges: List[List[str]]
     cpt_sizes: Dict[str, int] = {}
     state_counts: Dict[str, int] = {}
+    state_names: Dict[str, List[str]] = {}
     total_cpt_entries: int = 0
 
+def _check_heuristic(heuristic: str) -> None:
+    if heuristic not in HEURISTICS:
+        raise ValueError(f"Unknown elimination heuristic: {heuristic} (choose from {', '.join(HEURISTICS)})")
+
+def get_junction_tree(network: str, model, heuristic: str = DEFAULT_HEURISTIC) -> JunctionTreeEngine:
+    """Compiled junction tree for a network (built once per registry version and heuristic)."""
+    _check_heuristic(heuristic)
+    kind = "jt" if heuristic == DEFAULT_HEURISTIC else f"jt:{heuristic}"
+    return engine_cache.get(network, registry.version, kind, lambda: JunctionTreeEngine(model, heuristic=heuristic))
+
+def get_elimination_orderer(network: str, model) -> EliminationOrderer:
+    """Elimination orders of a network, cached per registry version."""
+    return engine_cache.get(network, registry.version, "orders", lambda: EliminationOrderer(model))
+
+def get_einsum_engine(network: str, model) -> EinsumEngine:
+    """Einsum contraction engine for a network (built once per registry version)."""
+    return engine_cache.get(network, registry.version, "einsum", lambda: EinsumEngine(model))
+
+def get_forward_sampler(network: str, model) -> ForwardSampler:
+    """Forward sampler for a network (built once per registry version)."""
+    return engine_cache.get(network, registry.version, "forward", lambda: ForwardSampler(model))
+
+def get_gibbs_sampler(network: str, model) -> GibbsSampler:
+    """Gibbs sampler for a network (built once per registry version)."""
+    return engine_cache.get(network, registry.version, "gibbs", lambda: GibbsSampler(model))
+
 # --- HTTP Endpoints ---
 
 @app.get("/health")
@@ -48,102 +157,577 @@ async def health_check():
 @app.get("/api/networks", response_model=List[NetworkInfo])
 async def get_networks():
     """Returns available networks and their structure."""
-    networks = get_all_networks()
-    info_list = []
-    for name, model in networks.items():
-        cpt_sizes: Dict[str, int] = {}
-        state_counts: Dict[str, int] = {}
-        total_cpt_entries = 0
-
-        for node in model.nodes():
-            cpd = model.get_cpds(node)
-            if cpd is None:
-                continue
-            try:
-                size = int(cpd.values.size)
-            except Exception:
-                size = 0
-            cpt_sizes[node] = size
-            try:
-                state_counts[node] = int(getattr(cpd, "variable_card", 0) or 0)
-            except Exception:
-                state_counts[node] = 0
-            total_cpt_entries += size
-
-        info_list.append(NetworkInfo(
-            name=name,
-            variables=list(model.nodes()),
-            nodes=list(model.nodes()),
-            edges=[list(edge) for edge in model.edges()],
-            cpt_sizes=cpt_sizes,
-            state_counts=state_counts,
-            total_cpt_entries=total_cpt_entries
-        ))
-    return info_list
+    return [
+        NetworkInfo(name=name, **summary)
+        for name, summary in registry.summaries().items()
+    ]
 
-@app.post("/api/inference")
-async def run_inference(req: InferenceRequest):
-    """Runs inference on the specified network."""
-    networks = get_all_networks()
-    if req.network not in networks:
+@app.get("/api/networks/{name}/elimination")
+async def get_elimination_orders(name: str, heuristic: Optional[str] = None):
+    """
+    Elimination order and estimated cost (induced width, largest factor,
+    FLOPs) of eliminating every variable, per heuristic -- cheapest first.
+    """
+    return await offload(execute_elimination, name, heuristic)
+
+@app.post("/api/networks/reload")
+async def reload_networks():
+    """Rebuilds the network registry (e.g. after editing a network factory)."""
+    # Building every network is slow; requests keep being served meanwhile.
+    version = await asyncio.to_thread(registry.reload)
+    return {"status": "reloaded", "version": version, "networks": list(registry.networks())}
+
+def _distribution(values, labels: Optional[List[str]] = None) -> Dict[str, float]:
+    """Maps a vector of (possibly unnormalized) state weights to {"state name": p}."""
+    labels = labels if labels is not None else [str(state) for state in range(len(values))]
+    return label_distribution(values, labels)
+
+
+def _encode(model, evidence: Evidence) -> Dict[str, int]:
+    """Evidence with state names resolved to indices (400 on unknown states)."""
+    try:
+        return encode_evidence(model, evidence)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _stopping_targets(req: InferenceRequest) -> tuple:
+    return (req.target_half_width, req.target_relative_error, req.max_time_ms)
+
+
+def _stopping_rule(req: InferenceRequest) -> Optional[StoppingRule]:
+    """Adaptive stopping rule requested by `req`, or None for a fixed budget."""
+    targets = _stopping_targets(req)
+    if all(t is None for t in targets):
+        return None
+    if any(t is not None and t <= 0 for t in targets):
+        raise ValueError("Stopping targets must be positive")
+    return StoppingRule(
+        half_width=req.target_half_width,
+        relative_error=req.target_relative_error,
+        max_time_s=req.max_time_ms / 1000 if req.max_time_ms is not None else None,
+    )
+
+
+def execute_adaptive(req: InferenceRequest, model, evidence: Dict[str, int], rule: StoppingRule) -> Dict[str, Any]:
+    """Samples in batches until `rule` is met or `req.samples` are spent."""
+    report_every = max(1000, req.samples // 50)  # at most ~50 precision checks
+    start = time.time()
+    diagnostics = None
+    if req.algorithm == "gibbs":
+        # Precision is judged on the chains' ESS, not their raw draw count, and
+        # only once split R-hat says they have mixed.
+        diagnostics = ChainDiagnostics()
+        progress = get_gibbs_sampler(req.network, model).iter_counts(
+            req.query_var, evidence, req.samples, report_every, req.burn_in,
+            rng=np.random.default_rng(req.seed), diagnostics=diagnostics, thin=req.thin)
+
+        def measure(counts):
+            summary = diagnostics.summary()
+            return counts, summary["ess"] or 0.0, summary
+
+        last, reason = run_until(progress, rule, measure)
+        weights, used, effective = last, int(last.sum()), diagnostics.effective_samples()
+    else:
+        sampler = get_forward_sampler(req.network, model)
+        run = sampler.iter_likelihood_weighting if req.algorithm == "lw" else sampler.iter_rejection
+        progress = run([req.query_var], evidence, req.samples, report_every, np.random.default_rng(req.seed))
+        last, reason = run_until(progress, rule, lambda p: (p.totals[req.query_var], p.effective_samples, None))
+        weights, used, effective = last.totals[req.query_var], last.drawn, float(last.effective_samples)
+    duration = time.time() - start
+
+    # No width yet if the chains have too few batches for an ESS estimate.
+    width = float(rule.half_widths(weights, effective).max())
+    result = {
+        "algorithm": req.algorithm,
+        "probabilities": _distribution(weights, state_labels(model, req.query_var)),
+        "time_ms": duration * 1000,
+        "samples": used,
+        "effective_samples": effective,
+        "stopped_by": reason,
+        "half_width": width if np.isfinite(width) else None,
+    }
+    if diagnostics is not None:
+        result["diagnostics"] = diagnostics.summary()
+    return result
+
+
+def execute_inference(req: InferenceRequest) -> Dict[str, Any]:
+    """Validates and answers a single inference request (raises HTTPException)."""
+    model = registry.get(req.network)
+    if model is None:
         raise HTTPException(status_code=404, detail="Network not found")
     
-    model = networks[req.network]
-    
     # Validate query variable exists in model
     if req.query_var not in model.nodes():
          raise HTTPException(status_code=400, detail=f"Query variable {req.query_var} not in network")
+    evidence = _encode(model, req.evidence)
+    if req.query_var in evidence:
+        raise HTTPException(status_code=400, detail=f"Query variable {req.query_var} is also observed")
+    labels = state_labels(model, req.query_var)
 
     # Standard response payload
     result = {
         "algorithm": req.algorithm,
         "probabilities": {},
         "time_ms": 0.0,
-        "samples": 0
+        "samples": 0,
+        "effective_samples": None
     }
 
     try:
+        rule = _stopping_rule(req)
+        if rule is not None and req.algorithm in ("gibbs", "lw", "rejection"):
+            return execute_adaptive(req, model, evidence, rule)
+
         if req.algorithm == "ve":
             # Exact inference via Variable Elimination (full distribution)
-            from pgmpy.inference import VariableElimination
-            import time
-            
             start = time.time()
-            ve = VariableElimination(model)
-            ve_res = ve.query([req.query_var], evidence=req.evidence, show_progress=False)
+            _check_heuristic(req.elimination)
+            ve = engine_cache.ve(req.network, registry.version, model, req.elimination)
+            ve_res = ve.query([req.query_var], evidence)
             duration = time.time() - start
-            
-            # Map values to binary states
-            result["probabilities"] = {
-                "0": ve_res.values[0],
-                "1": ve_res.values[1]
-            }
+            cost = ve.plan([req.query_var], evidence.keys()).cost
+
+            result["probabilities"] = _distribution(ve_res.values, labels)
+            result["time_ms"] = duration * 1000
+            result["elimination"] = {"heuristic": req.elimination, **cost._asdict()}
+
+        elif req.algorithm == "jt":
+            # Exact inference via the network's calibrated junction tree
+            start = time.time()
+            posterior = get_junction_tree(req.network, model, req.elimination).query(req.query_var, evidence)
+            duration = time.time() - start
+
+            result["probabilities"] = _distribution(posterior, labels)
+            result["time_ms"] = duration * 1000
+
+        elif req.algorithm == "einsum":
+            # Exact inference as one cached opt-einsum contraction
+            start = time.time()
+            posterior = get_einsum_engine(req.network, model).query([req.query_var], evidence)
+            duration = time.time() - start
+
+            result["probabilities"] = _distribution(posterior, labels)
             result["time_ms"] = duration * 1000
 
         elif req.algorithm == "gibbs":
-            # Approximate inference via Gibbs sampling (derive P(0) from P(1))
-            prob_1, duration = utils.run_gibbs_inference(
-                model, req.query_var, req.evidence, req.samples, target_state=1
+            # Approximate inference via Gibbs sampling (full distribution from state counts)
+            diagnostics = ChainDiagnostics()
+            posterior, duration = utils.gibbs_posterior(
+                model, req.query_var, evidence, req.samples,
+                diagnostics=diagnostics, burn_in=req.burn_in, thin=req.thin, jobs=GIBBS_JOBS, seed=req.seed
             )
-            prob_0 = 1.0 - prob_1
-            
-            result["probabilities"] = {
-                "0": prob_0,
-                "1": prob_1
-            }
+
+            result["probabilities"] = _distribution(posterior, labels)
             result["time_ms"] = duration * 1000
             result["samples"] = req.samples
-            
+            result["diagnostics"] = diagnostics.summary()
+            result["effective_samples"] = result["diagnostics"]["ess"]
+
+        elif req.algorithm in ("lw", "rejection"):
+            # Vectorized forward sampling: likelihood weighting or rejection
+            sampler = get_forward_sampler(req.network, model)
+            rng = np.random.default_rng(req.seed)
+            start = time.time()
+            if req.algorithm == "lw":
+                totals, ess = sampler.likelihood_weighting(req.query_var, evidence, req.samples, rng)
+            else:
+                totals, ess = sampler.rejection(req.query_var, evidence, req.samples, rng)
+            duration = time.time() - start
+
+            result["probabilities"] = _distribution(totals, labels)
+            result["time_ms"] = duration * 1000
+            result["samples"] = req.samples
+            result["effective_samples"] = float(ess)
+
         else:
              raise HTTPException(status_code=400, detail="Invalid algorithm")
 
         return result
 
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+
+def execute_group(items: List[InferenceRequest]) -> List[Dict[str, Any]]:
+    """
+    Answers requests that share network, algorithm, evidence and sample
+    budget. Junction-tree groups are served by one calibration, sampling
+    groups by one set of draws or chains; VE reuses the compiled per-network
+    engine item by item.
+    """
+    first = items[0]
+    model = registry.get(first.network)
+    query_vars = list(dict.fromkeys(item.query_var for item in items))
+    try:
+        evidence = encode_evidence(model, first.evidence) if model is not None else None
+    except ValueError:
+        evidence = None
+    shared = (
+        evidence is not None
+        and len(items) > 1
+        and first.algorithm in ("jt", "gibbs", "lw", "rejection")
+        and all(var in model.nodes() and var not in evidence for var in query_vars)
+        # Adaptive stopping is per query, so those items run one by one.
+        and all(t is None for item in items for t in _stopping_targets(item))
+    )
+    if not shared:
+        return [execute_inference(item) for item in items]
+
+    try:
+        rng = np.random.default_rng(first.seed)
+        start = time.time()
+        effective = None
+        diagnostics = {}
+        if first.algorithm == "jt":
+            posteriors = get_junction_tree(first.network, model, first.elimination).marginals(
+                evidence, query_vars)
+        elif first.algorithm == "gibbs":
+            diagnostics = {var: ChainDiagnostics() for var in query_vars}
+            posteriors = get_gibbs_sampler(first.network, model).sample_counts_many(
+                query_vars, evidence, first.samples, first.burn_in, rng=rng, diagnostics=diagnostics,
+                thin=first.thin)
+        elif first.algorithm == "lw":
+            posteriors, effective = get_forward_sampler(first.network, model).likelihood_weighting_many(
+                query_vars, evidence, first.samples, rng)
+        else:
+            posteriors, effective = get_forward_sampler(first.network, model).rejection_many(
+                query_vars, evidence, first.samples, rng)
+        duration = time.time() - start
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    sampled = first.algorithm != "jt"
+    results = []
+    for item in items:
+        result = {
+            "algorithm": item.algorithm,
+            "probabilities": _distribution(posteriors[item.query_var], state_labels(model, item.query_var)),
+            "time_ms": duration * 1000,
+            "samples": item.samples if sampled else 0,
+            "effective_samples": float(effective) if effective is not None else None,
+        }
+        if item.query_var in diagnostics:
+            # Same shape as a single Gibbs answer from execute_inference.
+            result["diagnostics"] = diagnostics[item.query_var].summary()
+            result["effective_samples"] = result["diagnostics"]["ess"]
+        results.append(result)
+    return results
+
+
+def execute_batch(batch: BatchInferenceRequest) -> Dict[str, Any]:
+    """Groups batch items by shared setup and answers them in request order."""
+    start = time.time()
+    groups: Dict[tuple, List[int]] = {}
+    for position, item in enumerate(batch.items):
+        key = (item.network, item.algorithm, tuple(sorted(item.evidence.items())), item.samples,
+               item.burn_in, item.thin, item.elimination, item.seed)
+        groups.setdefault(key, []).append(position)
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(batch.items)
+    for positions in groups.values():
+        items = [batch.items[p] for p in positions]
+        try:
+            answers = execute_group(items)
+        except Exception:
+            # Fall back to item-by-item so one bad query only fails itself.
+            answers = []
+            for item in items:
+                try:
+                    answers.append(execute_inference(item))
+                except HTTPException as e:
+                    answers.append({"algorithm": item.algorithm, "error": e.detail, "status_code": e.status_code})
+        for p, answer in zip(positions, answers):
+            results[p] = answer
+
+    return {"results": results, "time_ms": (time.time() - start) * 1000}
+
+
+def execute_marginals(req: MarginalsRequest) -> Dict[str, Any]:
+    """Posteriors of every variable given evidence (one junction-tree sweep)."""
+    model = registry.get(req.network)
+    if model is None:
+        raise HTTPException(status_code=404, detail="Network not found")
+
+    start = time.time()
+    try:
+        marginals = get_junction_tree(req.network, model).marginals(encode_evidence(model, req.evidence))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    duration = time.time() - start
+
+    return {
+        "algorithm": "jt",
+        "marginals": _marginals_payload(model, marginals),
+        "time_ms": duration * 1000,
+    }
+
+
+def execute_elimination(network: str, heuristic: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Elimination orders and costs of a network (one heuristic or all of them)."""
+    model = registry.get(network)
+    if model is None:
+        raise HTTPException(status_code=404, detail="Network not found")
+    orderer = get_elimination_orderer(network, model)
+    try:
+        if heuristic is not None:
+            _check_heuristic(heuristic)
+            orders = [orderer.order(heuristic)]
+        else:
+            orders = orderer.compare()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return [{"heuristic": o.heuristic, "order": o.order, **o.cost._asdict()} for o in orders]
+
+
+def _call_in_worker(version: int, fn, *args):
+    """Pool entry point: runs fn against the caller's registry version."""
+    # Worker processes hold their own registry; catch up after a reload.
+    registry.sync(version)
+    try:
+        return True, fn(*args)
+    except HTTPException as e:
+        # HTTPException does not pickle; ship its fields instead.
+        return False, (e.status_code, e.detail)
+
+
+async def offload(fn, *args):
+    """Runs a blocking execute_* function on the worker pool."""
+    try:
+        ok, value = await pool.run(_call_in_worker, registry.version, fn, *args)
+    except PoolSaturated:
+        raise HTTPException(status_code=429, detail="Server busy, retry shortly", headers={"Retry-After": "1"})
+    except PoolTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    if not ok:
+        status_code, detail = value
+        raise HTTPException(status_code=status_code, detail=detail)
+    return value
+
+
+def _evidence_key(network: str, evidence: Evidence) -> Dict[str, Any]:
+    """Evidence as indices where possible, so names and indices share cache entries."""
+    model = registry.get(network)
+    try:
+        return encode_evidence(model, evidence) if model is not None else evidence
+    except ValueError:
+        return evidence  # rejected (uncached) by the execute_* function
+
+
+async def cached(key, fn, *args) -> Dict[str, Any]:
+    """Serves an exact result from the result cache, computing it on a miss."""
+    start = time.time()
+    hit = result_cache.get(key)
+    if hit is not None:
+        return {**hit, "time_ms": (time.time() - start) * 1000, "cached": True}
+    result = await offload(fn, *args)
+    result_cache.put(key, result)
+    return {**result, "cached": False}
+
+
+@app.post("/api/inference")
+async def run_inference(req: InferenceRequest):
+    """Runs inference on the specified network."""
+    if req.algorithm in EXACT_ALGORITHMS:
+        # VE / JT answers also report (and validate) their elimination heuristic.
+        kind = req.algorithm if req.algorithm == "einsum" else f"{req.algorithm}:{req.elimination}"
+        key = canonical_key(req.network, registry.version, kind, req.query_var, _evidence_key(req.network, req.evidence))
+        return await cached(key, execute_inference, req)
+    return await offload(execute_inference, req)
+
+@app.post("/api/inference/batch")
+async def run_inference_batch(batch: BatchInferenceRequest):
+    """
+    Runs many inference requests in one call. Items are grouped by network,
+    algorithm, evidence and samples so each group shares its setup; results
+    come back in request order. A failing item yields an `error` entry
+    instead of failing the whole batch.
+    """
+    return await offload(execute_batch, batch)
+
+def _progress_event(counts: np.ndarray, labels: List[str], target: int, elapsed: float,
+                    diagnostics: ChainDiagnostics) -> str:
+    """SSE frame with the running Gibbs estimate and a standard-error bound."""
+    n = int(counts.sum())
+    p = counts / n
+    done = n >= target
+    summary = diagnostics.summary()
+    payload = {
+        "algorithm": "gibbs",
+        "probabilities": _distribution(counts, labels),
+        "samples": n,
+        "target_samples": target,
+        # Monte Carlo standard error of the worst-determined state; binomial
+        # (independent-draw) bound until the chains have enough batches
+        "std_error": summary["mcse"] if summary["mcse"] is not None else float(np.sqrt(np.max(p * (1 - p)) / n)),
+        "diagnostics": summary,
+        "time_ms": elapsed * 1000,
+        "done": done,
+    }
+    return f"event: {'done' if done else 'progress'}\ndata: {json.dumps(payload)}\n\n"
+
+
+@app.post("/api/inference/stream")
+async def stream_inference(req: StreamRequest, request: Request):
+    """
+    Streams running Gibbs estimates as Server-Sent Events every
+    `report_every` samples. Closing the connection stops the sampler.
+    """
+    model = registry.get(req.network)
+    if model is None:
+        raise HTTPException(status_code=404, detail="Network not found")
+    if req.algorithm != "gibbs":
+        raise HTTPException(status_code=400, detail="Streaming is only available for gibbs")
+    if req.query_var in req.evidence:
+        raise HTTPException(status_code=400, detail=f"Query variable {req.query_var} is also observed")
+    try:
+        pool.acquire()
+    except PoolSaturated:
+        raise HTTPException(status_code=429, detail="Server busy, retry shortly", headers={"Retry-After": "1"})
+
+    # The generator's `finally` never runs if the client leaves before the
+    # first event, so the response's background task releases the slot too;
+    # whichever comes first does it.
+    held = [True]
+
+    def release():
+        if held[0]:
+            held[0] = False
+            pool.release()
+
+    diagnostics = ChainDiagnostics()
+
+    def start_run():
+        # Building the sampler tabulates every Markov blanket: keep it off the loop.
+        return get_gibbs_sampler(req.network, model).iter_counts(
+            req.query_var, encode_evidence(model, req.evidence), req.samples, req.report_every, req.burn_in,
+            rng=np.random.default_rng(req.seed), diagnostics=diagnostics, thin=req.thin)
+
+    try:
+        progress = await asyncio.to_thread(start_run)
+        labels = state_labels(model, req.query_var)
+    except ValueError as e:
+        release()
+        raise HTTPException(status_code=400, detail=str(e))
+    except BaseException:
+        release()
+        raise
+
+    async def events():
+        loop = asyncio.get_running_loop()
+        start = time.time()
+        try:
+            while True:
+                # Each chunk of sweeps runs in a thread so the event loop stays free.
+                counts = await loop.run_in_executor(None, next, progress, None)
+                if counts is None or await request.is_disconnected():
+                    break
+                yield _progress_event(counts, labels, req.samples, time.time() - start, diagnostics)
+        finally:
+            release()
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"},
+                             background=BackgroundTask(release))
+
+@app.post("/api/marginals")
+async def run_marginals(req: MarginalsRequest):
+    """Posteriors of every variable given evidence (one junction-tree sweep)."""
+    key = canonical_key(req.network, registry.version, "marginals", None, _evidence_key(req.network, req.evidence))
+    return await cached(key, execute_marginals, req)
+
+def _marginals_payload(model, marginals: Dict[str, np.ndarray]) -> Dict[str, Dict[str, float]]:
+    return {var: _distribution(values, state_labels(model, var)) for var, values in marginals.items()}
+
+
+def _session_query(session: JunctionTreeSession, evidence: Evidence,
+                   variables: Optional[List[str]]) -> Dict[str, Any]:
+    """Applies new evidence to a session and returns the requested posteriors."""
+    model = session.engine.model
+    with session.lock:
+        start = time.time()
+        before = session.messages_computed
+        try:
+            previous = dict(session.evidence)
+            changed = session.update(encode_evidence(model, evidence))
+            try:
+                marginals = session.marginals(variables)
+            except ValueError:
+                session.update(previous)  # keep the session usable after impossible evidence
+                raise
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {
+            "algorithm": "jt",
+            "marginals": _marginals_payload(model, marginals),
+            "changed": changed,
+            "messages_computed": session.messages_computed - before,
+            "time_ms": (time.time() - start) * 1000,
+        }
+
+
+def _open_session(req: SessionRequest, model) -> tuple:
+    """Builds (or reuses) the junction tree and answers a new session's first query."""
+    try:
+        engine = get_junction_tree(req.network, model, req.elimination)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    session = JunctionTreeSession(engine)
+    return session, _session_query(session, req.evidence, None)
+
+
+async def in_session_thread(fn, *args):
+    """Runs session work on a thread, counted against the pool's admission limit."""
+    try:
+        pool.acquire()
+    except PoolSaturated:
+        raise HTTPException(status_code=429, detail="Server busy, retry shortly", headers={"Retry-After": "1"})
+    try:
+        return await asyncio.to_thread(fn, *args)
+    finally:
+        pool.release()
+
+
+@app.post("/api/sessions")
+async def create_session(req: SessionRequest):
+    """
+    Opens an interactive session on a network's junction tree. Follow-up
+    queries send the full evidence; only messages affected by the variables
+    that changed are recomputed.
+    """
+    model = registry.get(req.network)
+    if model is None:
+        raise HTTPException(status_code=404, detail="Network not found")
+    # Compiling the clique tree can take a while on large networks.
+    session, result = await in_session_thread(_open_session, req, model)
+    session_id = uuid.uuid4().hex
+    sessions.put(session_id, session)
+    return {"session_id": session_id, "network": req.network, **result}
+
+@app.post("/api/sessions/{session_id}/query")
+async def query_session(session_id: str, req: SessionQuery):
+    """Updates a session's evidence and returns posteriors."""
+    session = sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found or expired")
+    return await in_session_thread(_session_query, session, req.evidence, req.variables)
+
+@app.delete("/api/sessions/{session_id}")
+async def close_session(session_id: str):
+    sessions.pop(session_id)
+    return {"status": "closed"}
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Hit/miss counters of the exact-result cache."""
+    return {**result_cache.stats(), "registry_version": registry.version}
+
 @app.get("/")
 async def read_index():
     return FileResponse("web_app/index.html")
@@ -0,0 +1,63 @@
+"""
+State Names
+Maps between a variable's state names and the integer indices engines use.
+
+Engines address states by position in the CPD (0 .. cardinality-1). Clients
+may use either that index or the state's name from the CPD's `state_names`
+(e.g. {"Grade": "B"}); responses are keyed by `str(name)`, which for the
+default names 0, 1, ... is the familiar "0", "1", ...
+"""
+
+from typing import Any, Dict, List, Mapping, Sequence
+
+from pgmpy.factors.discrete import TabularCPD
+from pgmpy.models import DiscreteBayesianNetwork
+
+
+def cpd_state_names(cpd: TabularCPD) -> List[Any]:
+    """State names of a CPD's own variable, in CPD order."""
+    names = cpd.state_names.get(cpd.variable) if cpd.state_names else None
+    return list(names) if names else list(range(int(cpd.variable_card)))
+
+
+def state_names(model: DiscreteBayesianNetwork, var: str) -> List[Any]:
+    """State names of `var` in CPD order."""
+    cpd = model.get_cpds(var)
+    if cpd is None:
+        raise ValueError(f"Variable {var} not in network")
+    return cpd_state_names(cpd)
+
+
+def state_labels(model: DiscreteBayesianNetwork, var: str) -> List[str]:
+    """Response keys for the states of `var`."""
+    return [str(name) for name in state_names(model, var)]
+
+
+def state_index(model: DiscreteBayesianNetwork, var: str, state: Any) -> int:
+    """
+    Index of `state` (a state name, or an index) for `var`. Names win over
+    indices, so a state literally named 1 maps to its own position.
+    """
+    if var not in model.nodes():
+        raise ValueError(f"Variable {var} not in network")
+    names = state_names(model, var)
+    for i, name in enumerate(names):
+        if state == name or str(state) == str(name):
+            return i
+    if isinstance(state, int) and not isinstance(state, bool) and 0 <= state < len(names):
+        return state
+    raise ValueError(f"Unknown state {state!r} for {var} (states: {', '.join(map(str, names))})")
+
+
+def encode_evidence(model: DiscreteBayesianNetwork, evidence: Mapping[str, Any]) -> Dict[str, int]:
+    """Evidence with every state converted to its index."""
+    for var in evidence:
+        if var not in model.nodes():
+            raise ValueError(f"Evidence variable {var} not in network")
+    return {var: state_index(model, var, state) for var, state in evidence.items()}
+
+
+def label_distribution(values: Sequence[float], labels: Sequence[str]) -> Dict[str, float]:
+    """Maps a vector of (possibly unnormalized) state weights to {label: p}."""
+    total = float(sum(values))
+    return {label: float(v / total) if total > 0 else 0.0 for label, v in zip(labels, values)}
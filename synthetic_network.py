@@ -1,14 +1,38 @@
 """
 Synthetic Bayesian Network
-Small chain network for quick experiments.
+Small chain network for quick experiments, plus a seeded generator of large
+random networks for load and scaling tests.
 
 Structure:
   Rain -> Traffic -> Late
+
+Generated networks (create_random_network) have variables X0 .. X{n-1} and
+one of these topologies:
+  chain     X{i-1} -> X{i}
+  tree      every node has one parent among the earlier nodes
+  polytree  random tree with randomly oriented edges (no undirected cycles)
+  grid      rows x cols lattice, edges to the right and downwards
+  layered   ~sqrt(n) layers; parents are drawn from the previous layer
+Cardinalities are drawn per variable from a range and every CPT column
+from a flat Dirichlet, all from one seed, so a spec always yields the same
+network. Specs are written "topology:nodes[:max_in_degree[:cardinality[:seed]]]"
+(cardinality "k" or "lo-hi"), e.g. "layered:1000:3:2-4:7"; the
+GENERATED_NETWORKS environment variable lists specs (comma-separated) that
+get_all_networks() adds to the catalogue.
 """
 
+import math
+import os
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+import networkx as nx
+import numpy as np
 from pgmpy.models import DiscreteBayesianNetwork
 from pgmpy.factors.discrete import TabularCPD
 
+TOPOLOGIES = ("chain", "tree", "polytree", "grid", "layered")
+MAX_NODES = 10_000
+
 
 def create_synthetic_network():
     """Build and return the synthetic Bayesian network."""
@@ -59,6 +83,171 @@ def create_synthetic_network():
     return model
 
 
+# --- Generated networks ---
+
+class NetworkSpec(NamedTuple):
+    """Parameters of a generated network."""
+    topology: str
+    nodes: int
+    max_in_degree: int = 2
+    cardinality: Tuple[int, int] = (2, 2)
+    seed: int = 0
+
+    @property
+    def name(self) -> str:
+        """Registry name, e.g. "Layered (1000 vars)" (non-default options appended)."""
+        options = []
+        if self.max_in_degree != NetworkSpec._field_defaults["max_in_degree"]:
+            options.append(f"in-degree {self.max_in_degree}")
+        low, high = self.cardinality
+        if (low, high) != (2, 2):
+            options.append(f"{low} states" if low == high else f"{low}-{high} states")
+        if self.seed:
+            options.append(f"seed {self.seed}")
+        return f"{self.topology.capitalize()} ({', '.join([f'{self.nodes} vars'] + options)})"
+
+
+def parse_spec(text: str) -> NetworkSpec:
+    """Parses "topology:nodes[:max_in_degree[:cardinality[:seed]]]"."""
+    parts = text.strip().split(":")
+    if len(parts) < 2 or len(parts) > 5:
+        raise ValueError(f"Bad network spec {text!r} (expected topology:nodes[:max_in_degree[:cardinality[:seed]]])")
+    try:
+        low, _, high = parts[3].partition("-") if len(parts) > 3 else ("2", "", "")
+        spec = NetworkSpec(
+            topology=parts[0].strip().lower(),
+            nodes=int(parts[1]),
+            max_in_degree=int(parts[2]) if len(parts) > 2 else 2,
+            cardinality=(int(low), int(high or low)),
+            seed=int(parts[4]) if len(parts) > 4 else 0,
+        )
+    except ValueError:
+        raise ValueError(f"Bad network spec {text!r}: numbers expected after the topology")
+    _validate(spec)
+    return spec
+
+
+def _validate(spec: NetworkSpec) -> None:
+    if spec.topology not in TOPOLOGIES:
+        raise ValueError(f"Unknown topology: {spec.topology} (choose from {', '.join(TOPOLOGIES)})")
+    if not 1 <= spec.nodes <= MAX_NODES:
+        raise ValueError(f"Node count must be between 1 and {MAX_NODES}")
+    if spec.max_in_degree < 1:
+        raise ValueError("max_in_degree must be at least 1")
+    low, high = spec.cardinality
+    if not 2 <= low <= high:
+        raise ValueError("Cardinalities must satisfy 2 <= low <= high")
+
+
+def random_dag(spec: NetworkSpec) -> Tuple[List[str], List[Tuple[str, str]]]:
+    """Variables and edges of a generated network (structure only, cheap)."""
+    _validate(spec)
+    n, k = spec.nodes, spec.max_in_degree
+    rng = np.random.default_rng([spec.seed, 0])
+    parents: List[List[int]] = [[] for _ in range(n)]
+
+    if spec.topology == "chain":
+        for i in range(1, n):
+            parents[i] = [i - 1]
+    elif spec.topology == "tree":
+        for i in range(1, n):
+            parents[i] = [int(rng.integers(i))]
+    elif spec.topology == "polytree":
+        # Orient each tree edge at random; the newer node can always take
+        # another parent, so flip the edge when the older one is full.
+        for i in range(1, n):
+            j = int(rng.integers(i))
+            if rng.random() < 0.5 and len(parents[j]) < k:
+                parents[j].append(i)
+            else:
+                parents[i].append(j)
+    elif spec.topology == "grid":
+        cols = math.ceil(math.sqrt(n))
+        for i in range(n):
+            row, col = divmod(i, cols)
+            up_left = ([i - 1] if col > 0 else []) + ([i - cols] if row > 0 else [])
+            parents[i] = up_left[:k]
+    else:  # layered
+        width = max(1, math.ceil(math.sqrt(n)))
+        for i in range(width, n):
+            layer_start = (i // width) * width
+            previous = np.arange(layer_start - width, layer_start)
+            count = int(rng.integers(1, min(k, width) + 1))
+            parents[i] = sorted(int(p) for p in rng.choice(previous, size=count, replace=False))
+
+    names = [f"X{i}" for i in range(n)]
+    edges = [(names[p], names[i]) for i in range(n) for p in parents[i]]
+    return names, edges
+
+
+def create_random_network(spec: Union[NetworkSpec, str]) -> DiscreteBayesianNetwork:
+    """Build a generated network from a spec (or its string form) with seeded CPTs."""
+    if isinstance(spec, str):
+        spec = parse_spec(spec)
+    names, edges = random_dag(spec)
+    model = DiscreteBayesianNetwork()
+    model.add_nodes_from(names)
+    model.add_edges_from(edges)
+
+    rng = np.random.default_rng([spec.seed, 1])
+    low, high = spec.cardinality
+    card = {var: int(c) for var, c in zip(names, rng.integers(low, high + 1, size=len(names)))}
+    cpds = []
+    for var in names:
+        parents = list(model.get_parents(var))
+        columns = math.prod(card[p] for p in parents)
+        # One Dirichlet(1, ..., 1) draw per parent configuration
+        values = rng.dirichlet(np.ones(card[var]), size=columns).T
+        cpds.append(TabularCPD(
+            variable=var,
+            variable_card=card[var],
+            values=values,
+            evidence=parents or None,
+            evidence_card=[card[p] for p in parents] or None,
+        ))
+    # add_cpds and check_model compare every CPD with every other one
+    # (quadratic in the node count); these are valid by construction, one
+    # per variable with Dirichlet columns, so attach them directly.
+    model.cpds.extend(cpds)
+
+    print(f"OK: {spec.name} network created ({len(edges)} edges)")
+    return model
+
+
+def standard_query(order: List[str], edges: List[Tuple[str, str]]) -> Tuple[str, Dict[str, int], int]:
+    """
+    Standard (query_var, evidence, target_state) for a network whose
+    variables are given in topological `order`: the last variable is
+    observed and its farthest ancestor queried (the first variable if it
+    has none).
+    """
+    graph = nx.DiGraph(edges)
+    graph.add_nodes_from(order)
+    position = {var: i for i, var in enumerate(order)}
+    observed = order[-1]
+    ancestors = nx.ancestors(graph, observed)
+    query = min(ancestors, key=position.get) if ancestors else order[0]
+    if query == observed:  # single-variable network
+        return query, {}, 1
+    return query, {observed: 1}, 1
+
+
+def default_query(spec: NetworkSpec) -> Tuple[str, Dict[str, int], int]:
+    """Standard query of a generated network (see standard_query)."""
+    names, edges = random_dag(spec)
+    # Names are not in topological order for every topology (e.g. polytree).
+    graph = nx.DiGraph()
+    graph.add_nodes_from(names)
+    graph.add_edges_from(edges)
+    return standard_query(list(nx.topological_sort(graph)), edges)
+
+
+def generated_specs(text: Optional[str] = None) -> List[NetworkSpec]:
+    """Specs listed in `text` (default: the GENERATED_NETWORKS environment variable)."""
+    text = os.environ.get("GENERATED_NETWORKS", "") if text is None else text
+    return [parse_spec(part) for part in text.split(",") if part.strip()]
+
+
 if __name__ == "__main__":
     network = create_synthetic_network()
     print("\nOK: Network ready for inference")
@@ -20,6 +20,8 @@ let currentEvidence = {};
 let resizeHandlerBound = false;
 let pulseInterval = null;
 let flowInterval = null;
+let activeStream = null;
+let activeSession = null;
 
 // Cached DOM references
 const els = {
@@ -443,17 +445,34 @@ function renderNeuralMap() {
     highlightQueryNode();
 }
 
+function stateCount(varName) {
+    return (currentNetwork && currentNetwork.state_counts && currentNetwork.state_counts[varName]) || 2;
+}
+
+// Binary variables read FALSE / TRUE; multi-state ones by their state name.
+function stateLabel(varName, state) {
+    if (stateCount(varName) === 2) return Number(state) === 1 ? 'TRUE' : 'FALSE';
+    const names = currentNetwork && currentNetwork.state_names && currentNetwork.state_names[varName];
+    return names ? names[state] : String(state);
+}
+
 function toggleEvidence(nodeId) {
-    if (currentEvidence[nodeId] === 1) {
-        currentEvidence[nodeId] = 0;
-    } else if (currentEvidence[nodeId] === 0) {
-        delete currentEvidence[nodeId];
+    // Cycle clear -> highest state -> ... -> 0 -> clear (TRUE -> FALSE -> clear for binary)
+    const current = currentEvidence[nodeId];
+    if (current === undefined) {
+        currentEvidence[nodeId] = stateCount(nodeId) - 1;
+    } else if (current > 0) {
+        currentEvidence[nodeId] = current - 1;
     } else {
-        currentEvidence[nodeId] = 1;
+        delete currentEvidence[nodeId];
     }
 
     const node = networkVis.body.data.nodes.get(nodeId);
-    if (currentEvidence[nodeId] === 1) {
+    if (stateCount(nodeId) > 2 && currentEvidence[nodeId] !== undefined) {
+        node.color = { background: '#f59e0b', border: '#fff' };
+        node.shadow = { color: 'rgba(245, 158, 11, 0.8)', size: 20 };
+        node.label = `${node.baseLabel || node.id} (${stateLabel(nodeId, currentEvidence[nodeId])})`;
+    } else if (currentEvidence[nodeId] === 1) {
         node.color = { background: '#10b981', border: '#fff' };
         node.shadow = { color: 'rgba(16, 185, 129, 0.8)', size: 20 };
         node.label = `${node.baseLabel || node.id} (T)`;
@@ -579,9 +598,9 @@ function updateNeuralStatusUI() {
     let html = '<div style="display:grid; grid-template-columns:1fr 1fr; gap:5px;">';
     keys.forEach(k => {
         const val = currentEvidence[k];
-        const color = val === 1 ? '#10b981' : '#ef4444';
+        const color = stateCount(k) > 2 ? '#f59e0b' : (val === 1 ? '#10b981' : '#ef4444');
         html += `<div style="background:rgba(255,255,255,0.05); padding:4px 8px; border-radius:4px; font-size:0.75rem; border-left:3px solid ${color}">
-                    ${k}: <strong>${val === 1 ? 'TRUE' : 'FALSE'}</strong>
+                    ${k}: <strong>${stateLabel(k, val)}</strong>
                  </div>`;
     });
     html += '</div>';
@@ -638,9 +657,9 @@ async function runInference() {
                 samples: samples
             };
 
-            const [veData, gibbsData] = await Promise.all([
-                fetchInference({ ...payloadBase, algorithm: 've' }),
-                fetchInference({ ...payloadBase, algorithm: 'gibbs' })
+            const [veData, gibbsData] = await fetchInferenceBatch([
+                { ...payloadBase, algorithm: 've' },
+                { ...payloadBase, algorithm: 'gibbs' }
             ]);
 
             updateCompareResults(veData, gibbsData);
@@ -655,7 +674,11 @@ async function runInference() {
                 samples: samples
             };
 
-            const data = await fetchInference(payload);
+            const data = currentAlgorithm === 'gibbs'
+                ? await streamInference(payload, updateResults)
+                : currentAlgorithm === 'jt'
+                    ? await fetchSessionInference(payload)
+                    : await fetchInference(payload);
             updateResults(data);
 
             if (window.gsap) {
@@ -671,6 +694,7 @@ async function runInference() {
             setCompareAvailability(true);
         }
     } catch (err) {
+        if (err.name === 'AbortError') return;
         showToast("Something went wrong. Please try again.");
     } finally {
         els.runBtn.innerHTML = '<span class="btn-text">RUN INFERENCE</span><i class="ri-play-fill"></i>';
@@ -761,22 +785,143 @@ async function fetchInference(payload) {
     return data;
 }
 
+// Junction-tree queries go through a server session, so toggling one piece of
+// evidence only recomputes the messages it affects.
+async function fetchSessionInference(payload) {
+    const post = async (url, body) => {
+        const res = await fetch(url, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(body)
+        });
+        return { res, data: await res.json() };
+    };
+    const open = async () => {
+        const { res, data } = await post(`${API_BASE}/sessions`, {
+            network: payload.network,
+            evidence: payload.evidence
+        });
+        if (!res.ok) throw new Error(data.detail);
+        activeSession = { id: data.session_id, network: payload.network };
+        return data;
+    };
+
+    let data;
+    if (!activeSession || activeSession.network !== payload.network) {
+        data = await open();
+    } else {
+        const body = { evidence: payload.evidence, variables: [payload.query_var] };
+        const reply = await post(`${API_BASE}/sessions/${activeSession.id}/query`, body);
+        if (reply.res.status === 404) {
+            data = await open(); // expired or the server restarted
+        } else if (!reply.res.ok) {
+            throw new Error(reply.data.detail);
+        } else {
+            data = reply.data;
+        }
+    }
+    return {
+        algorithm: 'jt',
+        probabilities: data.marginals[payload.query_var],
+        time_ms: data.time_ms
+    };
+}
+
+// Streams running Gibbs estimates (SSE over fetch); a new run cancels the previous one.
+async function streamInference(payload, onProgress) {
+    if (activeStream) activeStream.abort();
+    const controller = new AbortController();
+    activeStream = controller;
+
+    const reportEvery = Math.max(500, Math.round(payload.samples / 20));
+    const res = await fetch(`${API_BASE}/inference/stream`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ ...payload, report_every: reportEvery }),
+        signal: controller.signal
+    });
+    if (!res.ok) {
+        const data = await res.json();
+        throw new Error(data.detail);
+    }
+
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let last = null;
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let sep;
+        while ((sep = buffer.indexOf('\n\n')) >= 0) {
+            const frame = buffer.slice(0, sep);
+            buffer = buffer.slice(sep + 2);
+            const line = frame.split('\n').find(l => l.startsWith('data: '));
+            if (!line) continue;
+            last = JSON.parse(line.slice(6));
+            if (!last.done) onProgress(last);
+        }
+    }
+    if (activeStream === controller) activeStream = null;
+    return last;
+}
+
+async function fetchInferenceBatch(items) {
+    const res = await fetch(`${API_BASE}/inference/batch`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ items })
+    });
+    const data = await res.json();
+    if (!res.ok) throw new Error(data.detail);
+    const failed = data.results.find(r => r.error);
+    if (failed) throw new Error(failed.error);
+    return data.results;
+}
+
+// Bar axis labels and values for every state of a posterior.
+function distributionBars(probabilities) {
+    const states = Object.keys(probabilities);
+    const labels = states.length === 2 && states[0] === '0' && states[1] === '1'
+        ? ['FALSE (0)', 'TRUE (1)']
+        : states.map(s => `State ${s}`);
+    return { labels, values: states.map(s => probabilities[s]) };
+}
+
+// Fills a pair of readouts with the first two states of a posterior, by their
+// actual keys (state names such as "yes"/"no" as well as "0"/"1"), and labels
+// each card with its state; the bar chart shows every state.
+function showStateReadouts(valueEls, probabilities) {
+    const states = Object.keys(probabilities);
+    const binary = states.length === 2 && states[0] === '0' && states[1] === '1';
+    valueEls.forEach((el, i) => {
+        const state = states[i];
+        const label = el.previousElementSibling;
+        if (label) {
+            label.textContent = binary ? ['P(FALSE)', 'P(TRUE)'][i] : (state !== undefined ? `P(${state})` : 'P(-)');
+        }
+        el.textContent = state !== undefined ? (probabilities[state] || 0).toFixed(4) : '--';
+    });
+}
+
 function updateResults(data) {
     // Stats
     els.prob0.className = 'value red';
     els.prob1.className = 'value green';
     els.latency.className = 'value cyan';
 
-    els.prob0.textContent = (data.probabilities['0'] || 0).toFixed(4);
-    els.prob1.textContent = (data.probabilities['1'] || 0).toFixed(4);
+    showStateReadouts([els.prob0, els.prob1], data.probabilities);
     els.latency.textContent = data.time_ms.toFixed(2) + ' ms';
 
+    const bars = distributionBars(data.probabilities);
+    const palette = bars.values.length === 2 ? ['#ef4444', '#10b981'] : '#6366f1';
     const trace = {
-        x: ['FALSE (0)', 'TRUE (1)'],
-        y: [data.probabilities['0'], data.probabilities['1']],
+        x: bars.labels,
+        y: bars.values,
         type: 'bar',
-        marker: { color: ['#ef4444', '#10b981'] },
-        text: [data.probabilities['0']?.toFixed(4), data.probabilities['1']?.toFixed(4)],
+        marker: { color: palette },
+        text: bars.values.map(v => v?.toFixed(4)),
         textposition: 'auto'
     };
 
@@ -799,25 +944,25 @@ function updateResults(data) {
 }
 
 function updateCompareResults(veData, gibbsData) {
-    els.veProb0.textContent = (veData.probabilities['0'] || 0).toFixed(4);
-    els.veProb1.textContent = (veData.probabilities['1'] || 0).toFixed(4);
+    showStateReadouts([els.veProb0, els.veProb1], veData.probabilities);
     els.veLatency.textContent = veData.time_ms.toFixed(2) + ' ms';
 
-    els.gibbsProb0.textContent = (gibbsData.probabilities['0'] || 0).toFixed(4);
-    els.gibbsProb1.textContent = (gibbsData.probabilities['1'] || 0).toFixed(4);
+    showStateReadouts([els.gibbsProb0, els.gibbsProb1], gibbsData.probabilities);
     els.gibbsLatency.textContent = gibbsData.time_ms.toFixed(2) + ' ms';
 
+    const veBars = distributionBars(veData.probabilities);
+    const gibbsBars = distributionBars(gibbsData.probabilities);
     const traceVe = {
-        x: ['FALSE (0)', 'TRUE (1)'],
-        y: [veData.probabilities['0'], veData.probabilities['1']],
+        x: veBars.labels,
+        y: veBars.values,
         type: 'bar',
         name: 'VE',
         marker: { color: '#06b6d4' }
     };
 
     const traceGibbs = {
-        x: ['FALSE (0)', 'TRUE (1)'],
-        y: [gibbsData.probabilities['0'], gibbsData.probabilities['1']],
+        x: gibbsBars.labels,
+        y: gibbsBars.values,
         type: 'bar',
         name: 'Gibbs',
         marker: { color: '#8b5cf6' }
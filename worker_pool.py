@@ -0,0 +1,123 @@
+"""
+Worker Pool
+Runs CPU-bound inference off the asyncio event loop with backpressure.
+
+Inference (VE, sampling) is synchronous and CPU-bound; awaiting it directly
+in an `async` endpoint stalls every other client, `/health` included. The
+pool hands each job to a process pool (default; one core per worker) or a
+thread pool, caps the number of admitted jobs and bounds how long a caller
+waits for one.
+
+Configuration (environment variables):
+  INFERENCE_POOL         "process" (default) or "thread"
+  INFERENCE_WORKERS      number of workers (default: CPU count)
+  INFERENCE_MAX_PENDING  jobs admitted at once, running + queued (default: 4 x workers)
+  INFERENCE_TIMEOUT_S    seconds a caller waits for its job (default: 30)
+"""
+
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing.util import Finalize
+from typing import Any, Callable, Optional
+
+
+class PoolSaturated(Exception):
+    """Raised when the pool already holds its maximum number of pending jobs."""
+
+
+class PoolTimeout(Exception):
+    """Raised when a job does not finish within the configured timeout."""
+
+
+def _stop_children() -> None:
+    for child in multiprocessing.active_children():
+        child.terminate()
+
+
+def _init_process_worker() -> None:
+    # A worker may start helper processes of its own (joblib keeps its Gibbs
+    # chain workers alive for reuse). Exiting workers join their children
+    # without running atexit hooks, so stop the helpers first.
+    Finalize(None, _stop_children, exitpriority=0)
+
+
+class InferencePool:
+    """Bounded executor front-end for CPU-bound jobs submitted from async code."""
+
+    def __init__(self, kind: str = "process", workers: Optional[int] = None,
+                 max_pending: Optional[int] = None, timeout_s: float = 30.0):
+        if kind not in ("process", "thread"):
+            raise ValueError(f"Unknown pool kind: {kind}")
+        self.kind = kind
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.max_pending = max(1, max_pending or 4 * self.workers)
+        self.timeout_s = timeout_s
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    @classmethod
+    def from_env(cls) -> "InferencePool":
+        workers = os.environ.get("INFERENCE_WORKERS")
+        max_pending = os.environ.get("INFERENCE_MAX_PENDING")
+        return cls(
+            kind=os.environ.get("INFERENCE_POOL", "process"),
+            workers=int(workers) if workers else None,
+            max_pending=int(max_pending) if max_pending else None,
+            timeout_s=float(os.environ.get("INFERENCE_TIMEOUT_S", "30")),
+        )
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def start(self) -> None:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_process_worker)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def acquire(self) -> None:
+        """Reserves a job slot (raises PoolSaturated when none is free)."""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise PoolSaturated(f"{self._pending} inference jobs pending")
+            self._pending += 1
+
+    def release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def _release(self, _: Future) -> None:
+        self.release()
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Runs fn(*args) on a worker. Raises PoolSaturated if the pool is full
+        and PoolTimeout if the job exceeds the timeout. A timed-out job keeps
+        its slot until it actually finishes, so abandoned work still counts
+        towards backpressure.
+        """
+        self.start()
+        self.acquire()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self.release()
+            raise
+        future.add_done_callback(self._release)
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout_s)
+        except asyncio.TimeoutError:
+            future.cancel()  # only succeeds if the job has not started yet
+            raise PoolTimeout(f"Inference exceeded {self.timeout_s:g}s")